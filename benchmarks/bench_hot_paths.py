@@ -0,0 +1,377 @@
+"""Benchmarks for the per-update and setup hot paths of the integration.
+
+Run from the repository root:
+
+    python benchmarks/bench_hot_paths.py             # compare with benchmarks/baseline.json
+    python benchmarks/bench_hot_paths.py --save      # store the results as the new baseline
+    python benchmarks/bench_hot_paths.py --check     # exit with 1 on a regression
+
+Source sensors are served by a fake ``hass.states``, so no Home Assistant
+instance is started. Benchmarks of code that imports Home Assistant are
+skipped when it is not installed; the tariff and accumulator
+benchmarks run everywhere.
+"""
+import argparse
+import asyncio
+import copy
+from datetime import datetime, timedelta, timezone
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "custom_components.electricity_cost_calculator_vn"
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+DEFAULT_TOLERANCE = 0.5  # Slowdown over the baseline reported as a regression
+REPEAT = 7  # Timing runs per benchmark, the fastest counts
+
+sys.path.insert(0, ROOT)
+try:
+    import homeassistant  # noqa: F401
+    HAS_HOMEASSISTANT = True
+except ImportError:
+    HAS_HOMEASSISTANT = False
+    # Load the hass-free modules without running the integration's __init__
+    _package = types.ModuleType(PACKAGE)
+    _package.__path__ = [os.path.join(ROOT, *PACKAGE.split("."))]
+    sys.modules[PACKAGE] = _package
+
+from custom_components.electricity_cost_calculator_vn.accumulator import EnergyAccumulator
+from custom_components.electricity_cost_calculator_vn.const import (
+    DOMAIN,
+    CONF_KWH_SENSOR,
+    CONF_POWER_SENSOR,
+    CONF_CURRENT_SENSOR,
+    CONF_VOLTAGE_SENSOR,
+    CONF_DEVICE_NAME,
+    CONF_DEVICES,
+    CONF_TIER_1_RATE,
+    CONF_TIER_2_RATE,
+    CONF_TIER_3_RATE,
+    CONF_TIER_4_RATE,
+    CONF_TIER_5_RATE,
+    CONF_TIER_6_RATE,
+    CONF_VAT_RATE,
+    CONF_COST_UNIT,
+    CONF_TARIFF_MODE,
+    CONF_PEAK_RATE,
+    CONF_NORMAL_RATE,
+    CONF_OFF_PEAK_RATE,
+    TARIFF_MODE_TIME_OF_USE,
+)
+from custom_components.electricity_cost_calculator_vn.tariff import CycleCost, TariffHistory, TieredTariff, build_tariff
+
+TARIFF_CONFIG = {
+    CONF_TIER_1_RATE: 1678.0,
+    CONF_TIER_2_RATE: 1734.0,
+    CONF_TIER_3_RATE: 2014.0,
+    CONF_TIER_4_RATE: 2536.0,
+    CONF_TIER_5_RATE: 2834.0,
+    CONF_TIER_6_RATE: 2927.0,
+    CONF_VAT_RATE: 0.1,
+    CONF_COST_UNIT: "VND",
+}
+
+class FakeState:
+    """Minimal stand-in for a Home Assistant state object."""
+
+    __slots__ = ("state", "attributes")
+
+    def __init__(self, state: str, unit: str):
+        """Initialize the state."""
+        self.state = state
+        self.attributes = {"unit_of_measurement": unit}
+
+class FakeStates:
+    """Dictionary-backed stand-in for ``hass.states``."""
+
+    def __init__(self, states: dict[str, FakeState]):
+        """Initialize the state machine."""
+        self._states = states
+
+    def get(self, entity_id: str) -> FakeState | None:
+        """Return the state of an entity."""
+        return self._states.get(entity_id)
+
+    def async_all(self, domain: str | None = None) -> list[FakeState]:
+        """Return all states."""
+        return list(self._states.values())
+
+class FakeBus:
+    """Event bus that drops the events."""
+
+    def async_fire(self, *args, **kwargs) -> None:
+        """Ignore the event."""
+
+class FakeCheckpoints:
+    """Checkpoint store that marks devices dirty like the real one but never writes."""
+
+    def __init__(self):
+        """Initialize the dirty marks."""
+        self._dirty: dict = {}
+
+    def async_checkpoint(self, key: str, data_func) -> None:
+        """Mark a device dirty."""
+        self._dirty[key] = data_func
+
+class FakeFlow:
+    """Config flow manager that drops import flows."""
+
+    async def async_init(self, *args, **kwargs) -> None:
+        """Ignore the flow."""
+
+class FakeHass:
+    """The parts of ``hass`` the integration touches outside of the event loop."""
+
+    def __init__(self, states: dict[str, FakeState]):
+        """Initialize the fake instance."""
+        self.states = FakeStates(states)
+        self.bus = FakeBus()
+        self.data: dict = {}
+        self.config = types.SimpleNamespace(config_dir=tempfile.gettempdir(), path=lambda *parts: os.path.join(tempfile.gettempdir(), *parts))
+        self.config_entries = types.SimpleNamespace(flow=FakeFlow())
+        self.loop = None
+
+    def async_create_task(self, coroutine) -> None:
+        """Close the coroutine instead of scheduling it."""
+        coroutine.close()
+
+def measure(function, number: int) -> dict:
+    """Return the best time per call and the memory allocated per call of function."""
+    best = float("inf")
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(number):
+            function()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "us_per_call": best / number * 1e6,
+        "retained_bytes_per_call": max(after - before, 0) / number,
+        "peak_kib": (peak - before) / 1024,
+    }
+
+def bench_tariff() -> dict:
+    """Pricing of the cycle consumption, as done on every update."""
+    tariff = TieredTariff.from_config(TARIFF_CONFIG)
+    values = [index * 0.731 for index in range(1000)]
+    results = {
+        "tiered_cost": measure(lambda: [tariff.cost(value) for value in values], 100),
+    }
+    history = TariffHistory.from_config(TARIFF_CONFIG)
+    moment = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    cycle_cost = CycleCost(history, moment)
+    results["cycle_cost_update"] = measure(lambda: [cycle_cost.update(value, moment) for value in values], 100)
+
+    tou = build_tariff(
+        {
+            **TARIFF_CONFIG,
+            CONF_TARIFF_MODE: TARIFF_MODE_TIME_OF_USE,
+            CONF_PEAK_RATE: 3000,
+            CONF_NORMAL_RATE: 1800,
+            CONF_OFF_PEAK_RATE: 1200,
+        }
+    )
+    steps = [moment + timedelta(minutes=7 * index) for index in range(1000)]
+    results["tou_cost_between"] = measure(
+        lambda: [tou.cost_between(0.1, start, end) for start, end in zip(steps, steps[1:])], 20
+    )
+    return {name: _per_item(result, 1000) for name, result in results.items()}
+
+def bench_accumulator() -> dict:
+    """Integration of power samples, as done on every power update."""
+    accumulator = EnergyAccumulator()
+    clock = [0.0]
+
+    def add_samples() -> None:
+        for index in range(1000):
+            clock[0] += 10
+            accumulator.add_sample(500.0 + index % 7, clock[0])
+
+    return {"accumulator_add_sample": _per_item(measure(add_samples, 100), 1000)}
+
+def _per_item(result: dict, items: int) -> dict:
+    """Scale a result measured over a batch of items to one item."""
+    return {
+        "us_per_call": result["us_per_call"] / items,
+        "retained_bytes_per_call": result["retained_bytes_per_call"] / items,
+        "peak_kib": result["peak_kib"],
+    }
+
+def bench_sources(updates: int = 20000) -> dict:
+    """Per-update latency of a coordinator refresh for each kind of source sensor."""
+    from custom_components.electricity_cost_calculator_vn.coordinator import ElectricityCostCoordinator
+
+    logging.getLogger(PACKAGE).setLevel(logging.WARNING)
+    hass = FakeHass(
+        {
+            "sensor.energy": FakeState("1234.5", "kWh"),
+            "sensor.power": FakeState("850", "W"),
+            "sensor.current": FakeState("4.2", "A"),
+            "sensor.voltage": FakeState("229.8", "V"),
+        }
+    )
+    entry = types.SimpleNamespace(entry_id="benchmark", data=TARIFF_CONFIG, options={})
+    history = TariffHistory.from_config(TARIFF_CONFIG)
+    checkpoints = FakeCheckpoints()
+    # Every timing run and the memory run get fresh values, so each refresh sees a change
+    calls = updates * (REPEAT + 1)
+
+    def refresh(sources: dict, entity_id: str, values: list[str]):
+        config = {**TARIFF_CONFIG, CONF_DEVICE_NAME: "Benchmark", **sources}
+        coordinator = ElectricityCostCoordinator(hass, entry, f"benchmark_{entity_id}", config, history, checkpoints)
+        state = hass.states.get(entity_id)
+        readings = iter(values)
+
+        def update() -> None:
+            state.state = next(readings)
+            coordinator.async_refresh()
+
+        return update
+
+    return {
+        "update_kwh_source": measure(
+            refresh({CONF_KWH_SENSOR: "sensor.energy"}, "sensor.energy", [f"{1234.5 + index * 0.001:.3f}" for index in range(calls)]),
+            updates,
+        ),
+        "update_power_source": measure(
+            refresh({CONF_POWER_SENSOR: "sensor.power"}, "sensor.power", [str(850 + index % 50) for index in range(calls)]),
+            updates,
+        ),
+        "update_current_voltage_source": measure(
+            refresh(
+                {CONF_CURRENT_SENSOR: "sensor.current", CONF_VOLTAGE_SENSOR: "sensor.voltage"},
+                "sensor.current",
+                [f"{4.2 + index % 50 * 0.01:.2f}" for index in range(calls)],
+            ),
+            updates,
+        ),
+    }
+
+def _yaml_config(devices: int) -> dict:
+    """Return a YAML configuration of one entry with the given number of devices."""
+    return {
+        DOMAIN: [
+            {
+                **TARIFF_CONFIG,
+                CONF_DEVICE_NAME: "Benchmark",
+                CONF_DEVICES: [
+                    {CONF_DEVICE_NAME: f"Device {index}", CONF_KWH_SENSOR: f"sensor.energy_{index}"}
+                    for index in range(devices)
+                ],
+            }
+        ]
+    }
+
+def bench_setup(devices: int) -> dict:
+    """Cost of validating the YAML configuration and creating the entities of an entry."""
+    from custom_components.electricity_cost_calculator_vn import async_setup
+    from custom_components.electricity_cost_calculator_vn.coordinator import ElectricityCostCoordinator, device_configs
+    from custom_components.electricity_cost_calculator_vn.sensor import ElectricityCostSensor, ElectricityKwhSensor
+
+    logging.getLogger(PACKAGE).setLevel(logging.WARNING)
+    hass = FakeHass({})
+    config = _yaml_config(devices)
+
+    def setup_yaml() -> None:
+        # async_setup cleans the configuration in place, so each run gets a fresh copy
+        asyncio.run(async_setup(hass, copy.deepcopy(config)))
+
+    entry = types.SimpleNamespace(entry_id="benchmark", data=config[DOMAIN][0], options={})
+    history = TariffHistory.from_config(entry.data)
+
+    def create_entities() -> None:
+        for key, device_config in device_configs(entry):
+            # Nothing is saved while creating entities, so no checkpoint store is needed
+            coordinator = ElectricityCostCoordinator(hass, entry, key, device_config, history, None)
+            ElectricityKwhSensor(coordinator)
+            ElectricityCostSensor(coordinator, False)
+            ElectricityCostSensor(coordinator, True)
+
+    return {
+        f"setup_yaml_{devices}_devices": measure(setup_yaml, 10),
+        f"create_entities_{devices}_devices": measure(create_entities, 10),
+    }
+
+def run(devices: int) -> tuple[dict, list[str]]:
+    """Run all benchmarks and return the results and the names of skipped groups."""
+    results = {}
+    skipped = []
+    results.update(bench_tariff())
+    results.update(bench_accumulator())
+    if HAS_HOMEASSISTANT:
+        results.update(bench_sources())
+        results.update(bench_setup(devices))
+    else:
+        skipped.extend(["sources", "setup"])
+    return results, skipped
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return a description of every benchmark that is slower than the baseline allows."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if result["us_per_call"] > reference["us_per_call"] * (1 + tolerance):
+            regressions.append(f"{name}: {result['us_per_call']:.3f} us, baseline {reference['us_per_call']:.3f} us")
+        if result["retained_bytes_per_call"] > reference["retained_bytes_per_call"] * (1 + tolerance) + 1:
+            regressions.append(
+                f"{name}: {result['retained_bytes_per_call']:.1f} B retained, baseline {reference['retained_bytes_per_call']:.1f} B"
+            )
+    return regressions
+
+def main() -> int:
+    """Run the benchmarks and compare them with the stored baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=50, help="Devices per entry in the setup benchmarks")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown, e.g. 0.5 for 50%%")
+    parser.add_argument("--save", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="Exit with 1 if a benchmark regressed")
+    args = parser.parse_args()
+
+    results, skipped = run(args.devices)
+    for name, result in sorted(results.items()):
+        print(
+            f"{name:40} {result['us_per_call']:10.3f} us/call "
+            f"{result['retained_bytes_per_call']:10.1f} B retained/call {result['peak_kib']:10.1f} KiB peak"
+        )
+    if skipped:
+        print(f"Skipped without Home Assistant installed: {', '.join(skipped)}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+
+    if args.save:
+        # Keep the baseline of benchmarks that were skipped in this run
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump({**baseline, **results}, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    return 1 if regressions and args.check else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,11 @@
+import asyncio
 import logging
-import re
 
 _LOGGER = logging.getLogger(__name__)
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.util import slugify
 
 from .const import (
     DOMAIN,
@@ -13,6 +14,8 @@ from .const import (
     CONF_CURRENT_SENSOR,
     CONF_VOLTAGE_SENSOR,
     CONF_DEVICE_NAME,
+    CONF_DEVICES,
+    CONF_GROUPS,
     CONF_TIER_1_RATE,
     CONF_TIER_2_RATE,
     CONF_TIER_3_RATE,
@@ -21,6 +24,21 @@ from .const import (
     CONF_TIER_6_RATE,
     CONF_VAT_RATE,
     CONF_COST_UNIT,
+    CONF_INTEGRATION_METHOD,
+    CONF_MAX_SAMPLE_GAP,
+    CONF_MAX_METER_JUMP,
+    CONF_METER_ROLLOVER,
+    CONF_BILLING_DAY,
+    CONF_IMPORT_STATISTICS,
+    CONF_LOG_THROTTLE_WINDOW,
+    CONF_INSTRUMENTATION,
+    CONF_POWER_FACTOR,
+    CONF_BUDGET,
+    CONF_MIN_PUBLISH_INTERVAL,
+    CONF_MAX_PUBLISH_INTERVAL,
+    CONF_PUBLISH_THRESHOLD,
+    CONF_PUBLISH_RELATIVE_THRESHOLD,
+    INTEGRATION_METHODS,
     DEFAULT_TIER_1_RATE,
     DEFAULT_TIER_2_RATE,
     DEFAULT_TIER_3_RATE,
@@ -29,7 +47,49 @@ from .const import (
     DEFAULT_TIER_6_RATE,
     DEFAULT_VAT_RATE,
     DEFAULT_COST_UNIT,
+    DEFAULT_INTEGRATION_METHOD,
+    DEFAULT_MAX_SAMPLE_GAP,
+    DEFAULT_MAX_METER_JUMP,
+    DEFAULT_METER_ROLLOVER,
+    DEFAULT_BILLING_DAY,
+    DEFAULT_IMPORT_STATISTICS,
+    DEFAULT_LOG_THROTTLE_WINDOW,
+    DEFAULT_INSTRUMENTATION,
+    DEFAULT_POWER_FACTOR,
+    DEFAULT_BUDGET,
+    DEFAULT_MIN_PUBLISH_INTERVAL,
+    DEFAULT_MAX_PUBLISH_INTERVAL,
+    DEFAULT_PUBLISH_THRESHOLD,
+    DEFAULT_PUBLISH_RELATIVE_THRESHOLD,
+    PUBLISH_CONFIG_KEYS,
 )
+from .checkpoint import async_get_checkpoints
+from .coordinator import ElectricityCostCoordinator, ElectricityCostData, async_track_rollovers, build_groups, device_configs, entry_config, group_keys
+from .normalize import clean_numeric_input
+from .phases import phase_config_error
+from .tariff import TariffHistory
+
+# Settings that change which entities exist or how they are set up; changing them needs a reload
+ENTITY_CONFIG_KEYS = [
+    CONF_DEVICE_NAME,
+    CONF_COST_UNIT,
+    CONF_GROUPS,
+    CONF_IMPORT_STATISTICS,
+    CONF_INSTRUMENTATION,
+]
+
+def _default_device_name(device: dict) -> str:
+    """Return the configured device name or one generated from the first sensor."""
+    device_name = device.get(CONF_DEVICE_NAME)
+    if not device_name:
+        for sensor_key in [CONF_KWH_SENSOR, CONF_POWER_SENSOR, CONF_CURRENT_SENSOR, CONF_VOLTAGE_SENSOR]:
+            sensor_id = device.get(sensor_key)
+            if sensor_id:
+                device_name = sensor_id.replace("sensor.", "").replace("_", " ").title()
+                break
+        if not device_name:
+            device_name = "Electricity Cost Device"
+    return device_name
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the Electricity Cost Calculator VN integration."""
@@ -37,17 +97,36 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     # If the integration is configured via YAML, set up a config entry
     if DOMAIN in config:
         for entry in config[DOMAIN]:
-            # Generate a default device name if none is provided
-            device_name = entry.get(CONF_DEVICE_NAME)
-            if not device_name:
-                for sensor_key in [CONF_KWH_SENSOR, CONF_POWER_SENSOR, CONF_CURRENT_SENSOR, CONF_VOLTAGE_SENSOR]:
-                    sensor_id = entry.get(sensor_key)
-                    if sensor_id:
-                        device_name = sensor_id.replace("sensor.", "").replace("_", " ").title()
-                        break
-                if not device_name:
-                    device_name = "Electricity Cost Device"
-            entry[CONF_DEVICE_NAME] = device_name
+            devices = entry.get(CONF_DEVICES)
+            if devices is not None:
+                # One entry for many devices sharing the tariff configured below; its name identifies the entry
+                if not entry.get(CONF_DEVICE_NAME):
+                    _LOGGER.error("A YAML entry with a devices list needs a %s", CONF_DEVICE_NAME)
+                    return False
+                for device in devices:
+                    if not (device.get(CONF_KWH_SENSOR) or device.get(CONF_POWER_SENSOR) or (device.get(CONF_CURRENT_SENSOR) and device.get(CONF_VOLTAGE_SENSOR))):
+                        _LOGGER.error("Device in YAML config has no kWh, power, or current and voltage sensor: %s", device)
+                        return False
+                    device[CONF_DEVICE_NAME] = _default_device_name(device)
+                device_keys = [slugify(device[CONF_DEVICE_NAME]) for device in devices]
+                if len(set(device_keys)) != len(device_keys):
+                    _LOGGER.error("Device names in a YAML devices list must be unique")
+                    return False
+                device_names = {device[CONF_DEVICE_NAME] for device in devices}
+                for group_name, member_names in (entry.get(CONF_GROUPS) or {}).items():
+                    unknown = set(member_names) - device_names
+                    if unknown:
+                        _LOGGER.error("Group %s in YAML config has unknown devices: %s", group_name, sorted(unknown))
+                        return False
+            else:
+                entry[CONF_DEVICE_NAME] = _default_device_name(entry)
+
+            # Validate the phase settings of every current and voltage source
+            for device_config in [{**entry, **device} for device in devices] if devices is not None else [entry]:
+                phase_error = phase_config_error(device_config)
+                if phase_error:
+                    _LOGGER.error("Invalid phase settings in YAML config for %s: %s", device_config[CONF_DEVICE_NAME], phase_error)
+                    return False
 
             # Add default pricing tiers, VAT rate, and cost unit if not provided
             entry.setdefault(CONF_TIER_1_RATE, DEFAULT_TIER_1_RATE)
@@ -61,8 +140,7 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
                     _LOGGER.error("Missing value for %s in YAML config", key)
                     return False
                 # Clean the input
-                cleaned_value = str(value).strip()
-                cleaned_value = re.sub(r"[^\d.-]", "", cleaned_value)
+                cleaned_value = clean_numeric_input(value)
                 try:
                     float_value = float(cleaned_value)
                     if float_value < 0:
@@ -88,8 +166,7 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
                 else:
                     value = entry[key]
                     # Clean the input
-                    cleaned_value = str(value).strip()
-                    cleaned_value = re.sub(r"[^\d.-]", "", cleaned_value)
+                    cleaned_value = clean_numeric_input(value)
                     try:
                         float_value = float(cleaned_value)
                         if float_value < 0:
@@ -107,6 +184,136 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
                 _LOGGER.error("Cost unit in YAML config cannot be empty")
                 return False
 
+            # Validate the tier boundaries and rates together, including any earlier tariff versions
+            try:
+                TariffHistory.from_config(entry)
+            except (KeyError, ValueError, TypeError) as e:
+                _LOGGER.error("Invalid tariff in YAML config: %s", e)
+                return False
+
+            # Settings below are validated at the block level and wherever a device overrides them
+            def overriding(key: str) -> list[dict]:
+                return [entry, *(device for device in devices or [] if key in device)]
+
+            # Validate power integration settings
+            entry.setdefault(CONF_INTEGRATION_METHOD, DEFAULT_INTEGRATION_METHOD)
+            for method_config in overriding(CONF_INTEGRATION_METHOD):
+                if method_config[CONF_INTEGRATION_METHOD] not in INTEGRATION_METHODS:
+                    _LOGGER.error("Invalid integration method in YAML config: %s (must be one of %s)", method_config[CONF_INTEGRATION_METHOD], INTEGRATION_METHODS)
+                    return False
+            entry.setdefault(CONF_MAX_SAMPLE_GAP, DEFAULT_MAX_SAMPLE_GAP)
+            for gap_config in overriding(CONF_MAX_SAMPLE_GAP):
+                try:
+                    max_sample_gap = int(gap_config[CONF_MAX_SAMPLE_GAP])
+                    if max_sample_gap < 0:
+                        _LOGGER.error("Invalid value for %s in YAML config: %s (must be non-negative)", CONF_MAX_SAMPLE_GAP, gap_config[CONF_MAX_SAMPLE_GAP])
+                        return False
+                    gap_config[CONF_MAX_SAMPLE_GAP] = max_sample_gap
+                except (ValueError, TypeError):
+                    _LOGGER.error("Invalid value for %s in YAML config: %s (must be a number)", CONF_MAX_SAMPLE_GAP, gap_config[CONF_MAX_SAMPLE_GAP])
+                    return False
+
+            # Validate the largest plausible change between two kWh readings
+            entry.setdefault(CONF_MAX_METER_JUMP, DEFAULT_MAX_METER_JUMP)
+            for jump_config in overriding(CONF_MAX_METER_JUMP):
+                try:
+                    max_meter_jump = float(jump_config[CONF_MAX_METER_JUMP])
+                    if max_meter_jump < 0:
+                        _LOGGER.error("Invalid value for %s in YAML config: %s (must be non-negative)", CONF_MAX_METER_JUMP, jump_config[CONF_MAX_METER_JUMP])
+                        return False
+                    jump_config[CONF_MAX_METER_JUMP] = max_meter_jump
+                except (ValueError, TypeError):
+                    _LOGGER.error("Invalid value for %s in YAML config: %s (must be a number)", CONF_MAX_METER_JUMP, jump_config[CONF_MAX_METER_JUMP])
+                    return False
+
+            # Validate the reading at which the kWh meter wraps around
+            entry.setdefault(CONF_METER_ROLLOVER, DEFAULT_METER_ROLLOVER)
+            for rollover_config in overriding(CONF_METER_ROLLOVER):
+                try:
+                    meter_rollover = float(rollover_config[CONF_METER_ROLLOVER])
+                    if meter_rollover < 0:
+                        _LOGGER.error("Invalid value for %s in YAML config: %s (must be non-negative)", CONF_METER_ROLLOVER, rollover_config[CONF_METER_ROLLOVER])
+                        return False
+                    rollover_config[CONF_METER_ROLLOVER] = meter_rollover
+                except (ValueError, TypeError):
+                    _LOGGER.error("Invalid value for %s in YAML config: %s (must be a number)", CONF_METER_ROLLOVER, rollover_config[CONF_METER_ROLLOVER])
+                    return False
+
+            # Validate the power factor applied to apparent power sources
+            entry.setdefault(CONF_POWER_FACTOR, DEFAULT_POWER_FACTOR)
+            for power_factor_config in overriding(CONF_POWER_FACTOR):
+                try:
+                    power_factor = float(power_factor_config[CONF_POWER_FACTOR])
+                    if not 0 < power_factor <= 1:
+                        _LOGGER.error("Invalid value for %s in YAML config: %s (must be above 0 and at most 1)", CONF_POWER_FACTOR, power_factor_config[CONF_POWER_FACTOR])
+                        return False
+                    power_factor_config[CONF_POWER_FACTOR] = power_factor
+                except (ValueError, TypeError):
+                    _LOGGER.error("Invalid value for %s in YAML config: %s (must be a number)", CONF_POWER_FACTOR, power_factor_config[CONF_POWER_FACTOR])
+                    return False
+
+            entry[CONF_IMPORT_STATISTICS] = bool(entry.get(CONF_IMPORT_STATISTICS, DEFAULT_IMPORT_STATISTICS))
+            entry[CONF_INSTRUMENTATION] = bool(entry.get(CONF_INSTRUMENTATION, DEFAULT_INSTRUMENTATION))
+            for key in (CONF_IMPORT_STATISTICS, CONF_INSTRUMENTATION):
+                for flag_config in overriding(key):
+                    flag_config[key] = bool(flag_config[key])
+
+            # Validate the window for suppressing repeated source warnings
+            entry.setdefault(CONF_LOG_THROTTLE_WINDOW, DEFAULT_LOG_THROTTLE_WINDOW)
+            for window_config in overriding(CONF_LOG_THROTTLE_WINDOW):
+                try:
+                    log_throttle_window = int(window_config[CONF_LOG_THROTTLE_WINDOW])
+                    if log_throttle_window < 0:
+                        _LOGGER.error("Invalid value for %s in YAML config: %s (must be non-negative)", CONF_LOG_THROTTLE_WINDOW, window_config[CONF_LOG_THROTTLE_WINDOW])
+                        return False
+                    window_config[CONF_LOG_THROTTLE_WINDOW] = log_throttle_window
+                except (ValueError, TypeError):
+                    _LOGGER.error("Invalid value for %s in YAML config: %s (must be a number)", CONF_LOG_THROTTLE_WINDOW, window_config[CONF_LOG_THROTTLE_WINDOW])
+                    return False
+
+            # Validate the cycle budgets that fire an event when exceeded
+            entry.setdefault(CONF_BUDGET, DEFAULT_BUDGET)
+            for budget_config in overriding(CONF_BUDGET):
+                try:
+                    budget = float(budget_config[CONF_BUDGET])
+                    if budget < 0:
+                        _LOGGER.error("Invalid value for %s in YAML config: %s (must be non-negative)", CONF_BUDGET, budget_config[CONF_BUDGET])
+                        return False
+                    budget_config[CONF_BUDGET] = budget
+                except (ValueError, TypeError):
+                    _LOGGER.error("Invalid value for %s in YAML config: %s (must be a number)", CONF_BUDGET, budget_config[CONF_BUDGET])
+                    return False
+
+            # Validate the state write coalescing settings
+            entry.setdefault(CONF_MIN_PUBLISH_INTERVAL, DEFAULT_MIN_PUBLISH_INTERVAL)
+            entry.setdefault(CONF_MAX_PUBLISH_INTERVAL, DEFAULT_MAX_PUBLISH_INTERVAL)
+            entry.setdefault(CONF_PUBLISH_THRESHOLD, DEFAULT_PUBLISH_THRESHOLD)
+            entry.setdefault(CONF_PUBLISH_RELATIVE_THRESHOLD, DEFAULT_PUBLISH_RELATIVE_THRESHOLD)
+            for key in PUBLISH_CONFIG_KEYS:
+                for publish_config in overriding(key):
+                    try:
+                        value = float(publish_config[key])
+                        if value < 0:
+                            _LOGGER.error("Invalid value for %s in YAML config: %s (must be non-negative)", key, publish_config[key])
+                            return False
+                        publish_config[key] = value
+                    except (ValueError, TypeError):
+                        _LOGGER.error("Invalid value for %s in YAML config: %s (must be a number)", key, publish_config[key])
+                        return False
+
+            # Validate the billing cycle reset day
+            entry.setdefault(CONF_BILLING_DAY, DEFAULT_BILLING_DAY)
+            for billing_config in overriding(CONF_BILLING_DAY):
+                try:
+                    billing_day = int(billing_config[CONF_BILLING_DAY])
+                    if not 1 <= billing_day <= 31:
+                        _LOGGER.error("Invalid value for %s in YAML config: %s (must be between 1 and 31)", CONF_BILLING_DAY, billing_config[CONF_BILLING_DAY])
+                        return False
+                    billing_config[CONF_BILLING_DAY] = billing_day
+                except (ValueError, TypeError):
+                    _LOGGER.error("Invalid value for %s in YAML config: %s (must be a number)", CONF_BILLING_DAY, billing_config[CONF_BILLING_DAY])
+                    return False
+
             hass.async_create_task(
                 hass.config_entries.flow.async_init(
                     DOMAIN, context={"source": "import"}, data=entry
@@ -117,16 +324,97 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Electricity Cost Calculator VN from a config entry."""
     _LOGGER.info("Setting up Electricity Cost Calculator VN with entry: %s", entry.data)
+
+    # Validate that the pricing tiers and VAT rate are present
+    required_fields = [
+        CONF_TIER_1_RATE,
+        CONF_TIER_2_RATE,
+        CONF_TIER_3_RATE,
+        CONF_TIER_4_RATE,
+        CONF_TIER_5_RATE,
+        CONF_TIER_6_RATE,
+        CONF_VAT_RATE,
+        CONF_COST_UNIT,
+    ]
+    config = entry_config(entry)
+    for field in required_fields:
+        if field not in config:
+            _LOGGER.error("Missing required field in config entry: %s", field)
+            return False
+
+    # Parse and validate the tariff history once for all devices of the entry
+    try:
+        tariff_history = TariffHistory.from_config(config)
+    except (KeyError, ValueError, TypeError) as e:
+        _LOGGER.error("Invalid pricing tier or VAT rate in config entry: %s", e)
+        return False
+
+    # One coordinator per device reads the sources once for all of its sensors
+    checkpoints = await async_get_checkpoints(hass)
+    coordinators = [
+        ElectricityCostCoordinator(hass, entry, key, device_config, tariff_history, checkpoints)
+        for key, device_config in device_configs(entry)
+    ]
+    # Groups must be attached before the first update so they see every change
+    groups = build_groups(hass, entry, coordinators, tariff_history, checkpoints)
+    for group in groups:
+        entry.async_on_unload(group.async_stop)
+    await asyncio.gather(*(member.async_load() for member in (*coordinators, *groups)))
+    for coordinator in coordinators:
+        coordinator.async_start()
+        entry.async_on_unload(coordinator.async_stop)
+    entry.async_on_unload(async_track_rollovers(hass, coordinators))
+    statistics = [coordinator.statistics for coordinator in coordinators if coordinator.statistics is not None]
+    await asyncio.gather(*(writer.async_start() for writer in statistics))
+    for writer in statistics:
+        entry.async_on_unload(writer.async_stop)
+
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = entry.data
+    hass.data[DOMAIN][entry.entry_id] = ElectricityCostData(coordinators, groups)
 
     # Forward the setup to the sensor platform
     await hass.config_entries.async_forward_entry_setups(entry, ["sensor"])
+
+    # Apply options changes to the running devices
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
     return True
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options in place, reloading the entry only if its entities change."""
+    data: ElectricityCostData = hass.data[DOMAIN][entry.entry_id]
+    coordinators = {coordinator.key: coordinator for coordinator in data.coordinators}
+    configs = dict(device_configs(entry))
+    if configs.keys() != coordinators.keys() or any(
+        coordinators[key].config.get(option) != device_config.get(option)
+        for key, device_config in configs.items()
+        for option in ENTITY_CONFIG_KEYS
+    ):
+        _LOGGER.info("Reloading %s to recreate its entities", entry.title)
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    config = entry_config(entry)
+    try:
+        tariff_history = TariffHistory.from_config(config)
+    except (KeyError, ValueError, TypeError) as e:
+        _LOGGER.error("Invalid pricing tier or VAT rate in options: %s", e)
+        return
+    for key, device_config in configs.items():
+        coordinators[key].async_reconfigure(device_config, tariff_history)
+    for group in data.groups:
+        group.async_reconfigure(tariff_history, config)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     _LOGGER.info("Unloading Electricity Cost Calculator VN entry: %s", entry.entry_id)
     await hass.config_entries.async_unload_platforms(entry, ["sensor"])
     hass.data[DOMAIN].pop(entry.entry_id)
-    return True
\ No newline at end of file
+    return True
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored billing cycle state of a deleted config entry."""
+    checkpoints = await async_get_checkpoints(hass)
+    for key, _ in device_configs(entry):
+        await checkpoints.async_remove(key)
+    for key in group_keys(entry).values():
+        await checkpoints.async_remove(key)
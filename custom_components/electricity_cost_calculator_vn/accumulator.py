@@ -0,0 +1,54 @@
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+from .const import (
+    INTEGRATION_METHOD_LEFT,
+    INTEGRATION_METHOD_TRAPEZOIDAL,
+)
+
+class EnergyAccumulator:
+    """Integrate power samples (W) over time into energy (kWh).
+
+    Only the previous sample and the running total are kept, so memory use is
+    constant no matter how many samples are added.
+    """
+
+    __slots__ = ("method", "max_gap", "energy_kwh", "_last_power", "_last_timestamp")
+
+    def __init__(self, method: str = INTEGRATION_METHOD_TRAPEZOIDAL, max_gap: float = 0, energy_kwh: float = 0.0):
+        """Initialize the accumulator."""
+        if method not in (INTEGRATION_METHOD_TRAPEZOIDAL, INTEGRATION_METHOD_LEFT):
+            raise ValueError(f"Unsupported integration method: {method}")
+        self.method = method
+        self.max_gap = max_gap
+        self.energy_kwh = energy_kwh
+        self._last_power: float | None = None
+        self._last_timestamp: float | None = None
+
+    def add_sample(self, power: float, timestamp: float) -> float:
+        """Add a power sample (W) taken at a Unix timestamp and return the kWh added."""
+        added = 0.0
+        if self._last_timestamp is not None:
+            elapsed = timestamp - self._last_timestamp
+            if elapsed < 0:
+                # Ignore samples that arrive out of order
+                return 0.0
+            if self.max_gap and elapsed > self.max_gap:
+                _LOGGER.debug("Clamping %.0f s gap between power samples to %s s", elapsed, self.max_gap)
+                elapsed = self.max_gap
+            if self.method == INTEGRATION_METHOD_TRAPEZOIDAL:
+                average_power = (self._last_power + power) / 2
+            else:
+                average_power = self._last_power
+            # W * s to kWh
+            added = average_power * elapsed / 3_600_000
+            self.energy_kwh += added
+        self._last_power = power
+        self._last_timestamp = timestamp
+        return added
+
+    def reset(self) -> None:
+        """Forget the previous sample, e.g. when the source becomes unavailable."""
+        self._last_power = None
+        self._last_timestamp = None
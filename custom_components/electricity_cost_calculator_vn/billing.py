@@ -0,0 +1,21 @@
+from calendar import monthrange
+from datetime import datetime
+
+def _reset_moment(moment: datetime, year: int, month: int, reset_day: int) -> datetime:
+    """Return midnight of the reset day in the given month, clamped to the month length."""
+    day = min(reset_day, monthrange(year, month)[1])
+    return moment.replace(year=year, month=month, day=day, hour=0, minute=0, second=0, microsecond=0)
+
+def cycle_start(moment: datetime, reset_day: int) -> datetime:
+    """Return the start of the billing cycle that contains moment."""
+    start = _reset_moment(moment, moment.year, moment.month, reset_day)
+    if start > moment:
+        year, month = (moment.year, moment.month - 1) if moment.month > 1 else (moment.year - 1, 12)
+        start = _reset_moment(moment, year, month, reset_day)
+    return start
+
+def next_cycle_start(moment: datetime, reset_day: int) -> datetime:
+    """Return the start of the billing cycle following the one that contains moment."""
+    start = cycle_start(moment, reset_day)
+    year, month = (start.year, start.month + 1) if start.month < 12 else (start.year + 1, 1)
+    return _reset_moment(start, year, month, reset_day)
@@ -0,0 +1,82 @@
+import asyncio
+from collections.abc import Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DATA_CHECKPOINTS,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+    STORAGE_SAVE_DELAY,
+)
+
+async def async_get_checkpoints(hass: HomeAssistant) -> "CheckpointStore":
+    """Return the checkpoint store shared by all entries, loading it on first use."""
+    checkpoints = hass.data.get(DATA_CHECKPOINTS)
+    if checkpoints is None:
+        checkpoints = hass.data[DATA_CHECKPOINTS] = CheckpointStore(hass)
+    await checkpoints.async_load()
+    return checkpoints
+
+class CheckpointStore:
+    """Persist the meter and billing cycle state of every device in one file.
+
+    Devices only mark themselves dirty. The first mark schedules one write
+    and later marks join it, so a write happens at most once per save delay
+    no matter how many devices update. Home Assistant flushes a pending write
+    on shutdown.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the store."""
+        self.hass = hass
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._data: dict[str, dict] = {}
+        self._dirty: dict[str, Callable[[], dict]] = {}
+        self._pending = False
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    async def async_load(self) -> None:
+        """Read the checkpoints once; concurrent entry setups wait for the same read."""
+        async with self._lock:
+            if self._loaded:
+                return
+            self._data = await self._store.async_load() or {}
+            self._loaded = True
+
+    async def async_restore(self, key: str) -> dict | None:
+        """Return the last checkpoint of a device, including a change not yet written."""
+        data_func = self._dirty.pop(key, None)
+        if data_func is not None:
+            # The entry was reloaded before the pending write
+            self._data[key] = data_func()
+        return self._data.get(key)
+
+    @callback
+    def async_checkpoint(self, key: str, data_func: Callable[[], dict]) -> None:
+        """Mark a device dirty; its state is read from data_func when the write happens."""
+        self._dirty[key] = data_func
+        if not self._pending:
+            self._pending = True
+            self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Collect the state of all dirty devices for one write."""
+        self._pending = False
+        for key, data_func in self._dirty.items():
+            self._data[key] = data_func()
+        self._dirty.clear()
+        return self._data
+
+    async def _async_save_now(self) -> None:
+        """Write immediately, including dirty devices; this replaces any pending write."""
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self, key: str) -> None:
+        """Forget the checkpoint of a removed device."""
+        self._dirty.pop(key, None)
+        if self._data.pop(key, None) is not None:
+            await self._async_save_now()
@@ -1,9 +1,10 @@
 from homeassistant import config_entries
-from homeassistant.core import callback
-from homeassistant.helpers import entity_registry as er
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import selector
+from homeassistant.util import dt as dt_util
 import voluptuous as vol
 import logging
-import re
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -14,23 +15,305 @@ from .const import (
     CONF_CURRENT_SENSOR,
     CONF_VOLTAGE_SENSOR,
     CONF_DEVICE_NAME,
+    CONF_DEVICES,
     CONF_TIER_1_RATE,
     CONF_TIER_2_RATE,
     CONF_TIER_3_RATE,
     CONF_TIER_4_RATE,
     CONF_TIER_5_RATE,
     CONF_TIER_6_RATE,
+    CONF_TIER_BOUNDARIES,
+    CONF_TIER_RATES,
     CONF_VAT_RATE,
     CONF_COST_UNIT,
+    CONF_TARIFF_MODE,
+    CONF_PEAK_RATE,
+    CONF_NORMAL_RATE,
+    CONF_OFF_PEAK_RATE,
+    CONF_INTEGRATION_METHOD,
+    CONF_MAX_SAMPLE_GAP,
+    CONF_MAX_METER_JUMP,
+    CONF_METER_ROLLOVER,
+    CONF_BILLING_DAY,
+    CONF_BUDGET,
+    CONF_IMPORT_STATISTICS,
+    CONF_LOG_THROTTLE_WINDOW,
+    CONF_MIN_PUBLISH_INTERVAL,
+    CONF_MAX_PUBLISH_INTERVAL,
+    CONF_PUBLISH_THRESHOLD,
+    CONF_PUBLISH_RELATIVE_THRESHOLD,
+    INTEGRATION_METHODS,
+    TARIFF_MODES,
     DEFAULT_TIER_1_RATE,
     DEFAULT_TIER_2_RATE,
     DEFAULT_TIER_3_RATE,
     DEFAULT_TIER_4_RATE,
     DEFAULT_TIER_5_RATE,
     DEFAULT_TIER_6_RATE,
+    DEFAULT_TIER_BOUNDARIES,
     DEFAULT_VAT_RATE,
     DEFAULT_COST_UNIT,
+    DEFAULT_TARIFF_MODE,
+    DEFAULT_INTEGRATION_METHOD,
+    DEFAULT_MAX_SAMPLE_GAP,
+    DEFAULT_MAX_METER_JUMP,
+    DEFAULT_METER_ROLLOVER,
+    DEFAULT_BILLING_DAY,
+    DEFAULT_BUDGET,
+    DEFAULT_IMPORT_STATISTICS,
+    DEFAULT_LOG_THROTTLE_WINDOW,
+    DEFAULT_MIN_PUBLISH_INTERVAL,
+    DEFAULT_MAX_PUBLISH_INTERVAL,
+    DEFAULT_PUBLISH_THRESHOLD,
+    DEFAULT_PUBLISH_RELATIVE_THRESHOLD,
+    CONF_INSTRUMENTATION,
+    DEFAULT_INSTRUMENTATION,
+    CONF_POWER_FACTOR,
+    DEFAULT_POWER_FACTOR,
+    CONF_POWER_FACTOR_SENSOR,
+    CONF_CURRENT_SENSOR_2,
+    CONF_CURRENT_SENSOR_3,
+    CONF_VOLTAGE_SENSOR_2,
+    CONF_VOLTAGE_SENSOR_3,
+    CONF_PHASES,
+    PHASES,
+    DEFAULT_PHASES,
+    CONF_VOLTAGE_TYPE,
+    VOLTAGE_TYPES,
+    DEFAULT_VOLTAGE_TYPE,
+    CONF_TARIFF_HISTORY,
 )
+from .coordinator import entry_config
+from .normalize import CURRENT_UNITS, ENERGY_UNITS, POWER_SOURCE_UNITS, VOLTAGE_UNITS, clean_numeric_input
+from .phases import phase_config_error
+from .tariff import append_tariff_version, build_tariff
+
+# Device classes and units that identify suitable sources for each sensor field
+SENSOR_FIELD_FILTERS = {
+    CONF_KWH_SENSOR: ({SensorDeviceClass.ENERGY}, set(ENERGY_UNITS)),
+    CONF_POWER_SENSOR: ({SensorDeviceClass.POWER, SensorDeviceClass.APPARENT_POWER}, set(POWER_SOURCE_UNITS)),
+    CONF_CURRENT_SENSOR: ({SensorDeviceClass.CURRENT}, set(CURRENT_UNITS)),
+    CONF_VOLTAGE_SENSOR: ({SensorDeviceClass.VOLTAGE}, set(VOLTAGE_UNITS)),
+    CONF_CURRENT_SENSOR_2: ({SensorDeviceClass.CURRENT}, set(CURRENT_UNITS)),
+    CONF_CURRENT_SENSOR_3: ({SensorDeviceClass.CURRENT}, set(CURRENT_UNITS)),
+    CONF_VOLTAGE_SENSOR_2: ({SensorDeviceClass.VOLTAGE}, set(VOLTAGE_UNITS)),
+    CONF_VOLTAGE_SENSOR_3: ({SensorDeviceClass.VOLTAGE}, set(VOLTAGE_UNITS)),
+    # A bare ratio or % says nothing about the sensor, so only the device class counts
+    CONF_POWER_FACTOR_SENSOR: ({SensorDeviceClass.POWER_FACTOR}, set()),
+}
+
+def _build_sensor_index(hass: HomeAssistant) -> dict[str, list[str]]:
+    """Group sensor entities by the field they fit, based on device class or unit.
+
+    Template, MQTT and Tasmota sensors often report a unit but no device class,
+    so either one qualifies a sensor.
+    """
+    index = {field: [] for field in SENSOR_FIELD_FILTERS}
+    for state in hass.states.async_all("sensor"):
+        device_class = state.attributes.get("device_class")
+        unit = str(state.attributes.get("unit_of_measurement") or "").lower()
+        for field, (device_classes, units) in SENSOR_FIELD_FILTERS.items():
+            if device_class in device_classes or unit in units:
+                index[field].append(state.entity_id)
+    return index
+
+def _sensor_selector(sensor_index: dict[str, list[str]], field: str) -> selector.EntitySelector:
+    """Return an entity selector limited to the sensors that fit the field."""
+    return selector.EntitySelector(
+        selector.EntitySelectorConfig(domain="sensor", include_entities=sensor_index[field])
+    )
+
+def _source_errors(hass: HomeAssistant, user_input: dict) -> dict[str, str]:
+    """Return the form errors of the selected source sensors, if any."""
+    if not (user_input.get(CONF_KWH_SENSOR) or user_input.get(CONF_POWER_SENSOR) or (user_input.get(CONF_CURRENT_SENSOR) and user_input.get(CONF_VOLTAGE_SENSOR))):
+        return {"base": "no_sensor_selected"}
+    for field in SENSOR_FIELD_FILTERS:
+        sensor_id = user_input.get(field)
+        if sensor_id:
+            state = hass.states.get(sensor_id)
+            if state is None or state.state in ("unknown", "unavailable"):
+                return {field: "invalid_sensor"}
+    return {}
+
+def _format_number_list(value) -> str:
+    """Format a list of numbers for display in a text field."""
+    if isinstance(value, str):
+        return value
+    return ", ".join(f"{number:g}" for number in value)
+
+def _options_schema(config: dict, sensor_index: dict[str, list[str]]) -> vol.Schema:
+    """Return the options form, filled in from the current config.
+
+    An entry with a devices list has no sources of its own; a sensor picked at
+    its level would replace the source of every device, so those fields are left out.
+    """
+    schema = vol.Schema(
+        {
+            vol.Optional(
+                CONF_KWH_SENSOR,
+                description={"suggested_value": config.get(CONF_KWH_SENSOR)},
+            ): _sensor_selector(sensor_index, CONF_KWH_SENSOR),
+            vol.Optional(
+                CONF_POWER_SENSOR,
+                description={"suggested_value": config.get(CONF_POWER_SENSOR)},
+            ): _sensor_selector(sensor_index, CONF_POWER_SENSOR),
+            vol.Optional(
+                CONF_CURRENT_SENSOR,
+                description={"suggested_value": config.get(CONF_CURRENT_SENSOR)},
+            ): _sensor_selector(sensor_index, CONF_CURRENT_SENSOR),
+            vol.Optional(
+                CONF_VOLTAGE_SENSOR,
+                description={"suggested_value": config.get(CONF_VOLTAGE_SENSOR)},
+            ): _sensor_selector(sensor_index, CONF_VOLTAGE_SENSOR),
+            vol.Optional(
+                CONF_PHASES,
+                default=config.get(CONF_PHASES, DEFAULT_PHASES),
+            ): vol.All(vol.Coerce(int), vol.In(PHASES)),
+            vol.Optional(
+                CONF_VOLTAGE_TYPE,
+                default=config.get(CONF_VOLTAGE_TYPE, DEFAULT_VOLTAGE_TYPE),
+            ): vol.In(VOLTAGE_TYPES),
+            vol.Optional(
+                CONF_CURRENT_SENSOR_2,
+                description={"suggested_value": config.get(CONF_CURRENT_SENSOR_2)},
+            ): _sensor_selector(sensor_index, CONF_CURRENT_SENSOR_2),
+            vol.Optional(
+                CONF_CURRENT_SENSOR_3,
+                description={"suggested_value": config.get(CONF_CURRENT_SENSOR_3)},
+            ): _sensor_selector(sensor_index, CONF_CURRENT_SENSOR_3),
+            vol.Optional(
+                CONF_VOLTAGE_SENSOR_2,
+                description={"suggested_value": config.get(CONF_VOLTAGE_SENSOR_2)},
+            ): _sensor_selector(sensor_index, CONF_VOLTAGE_SENSOR_2),
+            vol.Optional(
+                CONF_VOLTAGE_SENSOR_3,
+                description={"suggested_value": config.get(CONF_VOLTAGE_SENSOR_3)},
+            ): _sensor_selector(sensor_index, CONF_VOLTAGE_SENSOR_3),
+            vol.Optional(
+                CONF_POWER_FACTOR_SENSOR,
+                description={"suggested_value": config.get(CONF_POWER_FACTOR_SENSOR)},
+            ): _sensor_selector(sensor_index, CONF_POWER_FACTOR_SENSOR),
+            vol.Optional(
+                CONF_DEVICE_NAME,
+                default=config.get(CONF_DEVICE_NAME),
+            ): str,
+            vol.Optional(
+                CONF_INTEGRATION_METHOD,
+                default=config.get(CONF_INTEGRATION_METHOD, DEFAULT_INTEGRATION_METHOD),
+            ): vol.In(INTEGRATION_METHODS),
+            vol.Optional(
+                CONF_MAX_SAMPLE_GAP,
+                default=config.get(CONF_MAX_SAMPLE_GAP, DEFAULT_MAX_SAMPLE_GAP),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+            vol.Optional(
+                CONF_MAX_METER_JUMP,
+                default=config.get(CONF_MAX_METER_JUMP, DEFAULT_MAX_METER_JUMP),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Optional(
+                CONF_METER_ROLLOVER,
+                default=config.get(CONF_METER_ROLLOVER, DEFAULT_METER_ROLLOVER),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Optional(
+                CONF_POWER_FACTOR,
+                default=config.get(CONF_POWER_FACTOR, DEFAULT_POWER_FACTOR),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False, max=1)),
+            vol.Optional(
+                CONF_IMPORT_STATISTICS,
+                default=config.get(CONF_IMPORT_STATISTICS, DEFAULT_IMPORT_STATISTICS),
+            ): bool,
+            vol.Optional(
+                CONF_LOG_THROTTLE_WINDOW,
+                default=config.get(CONF_LOG_THROTTLE_WINDOW, DEFAULT_LOG_THROTTLE_WINDOW),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+            vol.Optional(
+                CONF_MIN_PUBLISH_INTERVAL,
+                default=config.get(CONF_MIN_PUBLISH_INTERVAL, DEFAULT_MIN_PUBLISH_INTERVAL),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Optional(
+                CONF_MAX_PUBLISH_INTERVAL,
+                default=config.get(CONF_MAX_PUBLISH_INTERVAL, DEFAULT_MAX_PUBLISH_INTERVAL),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Optional(
+                CONF_PUBLISH_THRESHOLD,
+                default=config.get(CONF_PUBLISH_THRESHOLD, DEFAULT_PUBLISH_THRESHOLD),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Optional(
+                CONF_PUBLISH_RELATIVE_THRESHOLD,
+                default=config.get(CONF_PUBLISH_RELATIVE_THRESHOLD, DEFAULT_PUBLISH_RELATIVE_THRESHOLD),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Optional(
+                CONF_INSTRUMENTATION,
+                default=config.get(CONF_INSTRUMENTATION, DEFAULT_INSTRUMENTATION),
+            ): bool,
+            vol.Required(
+                CONF_TIER_1_RATE,
+                default=config.get(CONF_TIER_1_RATE, DEFAULT_TIER_1_RATE),
+            ): str,
+            vol.Optional(
+                CONF_TIER_2_RATE,
+                default=config.get(CONF_TIER_2_RATE, DEFAULT_TIER_2_RATE),
+            ): str,
+            vol.Optional(
+                CONF_TIER_3_RATE,
+                default=config.get(CONF_TIER_3_RATE, DEFAULT_TIER_3_RATE),
+            ): str,
+            vol.Optional(
+                CONF_TIER_4_RATE,
+                default=config.get(CONF_TIER_4_RATE, DEFAULT_TIER_4_RATE),
+            ): str,
+            vol.Optional(
+                CONF_TIER_5_RATE,
+                default=config.get(CONF_TIER_5_RATE, DEFAULT_TIER_5_RATE),
+            ): str,
+            vol.Optional(
+                CONF_TIER_6_RATE,
+                default=config.get(CONF_TIER_6_RATE, DEFAULT_TIER_6_RATE),
+            ): str,
+            vol.Optional(
+                CONF_TIER_BOUNDARIES,
+                default=_format_number_list(config.get(CONF_TIER_BOUNDARIES, DEFAULT_TIER_BOUNDARIES)),
+            ): str,
+            vol.Optional(
+                CONF_TIER_RATES,
+                default=_format_number_list(config.get(CONF_TIER_RATES, "")),
+            ): str,
+            vol.Optional(
+                CONF_TARIFF_MODE,
+                default=config.get(CONF_TARIFF_MODE, DEFAULT_TARIFF_MODE),
+            ): vol.In(TARIFF_MODES),
+            vol.Optional(
+                CONF_PEAK_RATE,
+                default=str(config.get(CONF_PEAK_RATE, "")),
+            ): str,
+            vol.Optional(
+                CONF_NORMAL_RATE,
+                default=str(config.get(CONF_NORMAL_RATE, "")),
+            ): str,
+            vol.Optional(
+                CONF_OFF_PEAK_RATE,
+                default=str(config.get(CONF_OFF_PEAK_RATE, "")),
+            ): str,
+            vol.Required(
+                CONF_VAT_RATE,
+                default=config.get(CONF_VAT_RATE, DEFAULT_VAT_RATE),
+            ): str,
+            vol.Required(
+                CONF_COST_UNIT,
+                default=config.get(CONF_COST_UNIT, DEFAULT_COST_UNIT),
+            ): str,
+            vol.Optional(
+                CONF_BILLING_DAY,
+                default=config.get(CONF_BILLING_DAY, DEFAULT_BILLING_DAY),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=31)),
+            vol.Optional(
+                CONF_BUDGET,
+                default=config.get(CONF_BUDGET, DEFAULT_BUDGET),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        }
+    )
+    if CONF_DEVICES in config:
+        schema = vol.Schema({key: value for key, value in schema.schema.items() if key not in SENSOR_FIELD_FILTERS})
+    return schema
 
 class ElectricityCostCalculatorVNConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Electricity Cost Calculator VN."""
@@ -40,86 +323,83 @@ class ElectricityCostCalculatorVNConfigFlow(config_entries.ConfigFlow, domain=DO
     def __init__(self):
         """Initialize the config flow."""
         self._data = {}
+        self._sensor_index: dict[str, list[str]] | None = None
 
-    def _clean_numeric_input(self, value):
-        """Clean a numeric input by removing whitespace and common formatting characters."""
-        if value is None:
-            return None
-        # Convert to string and strip whitespace
-        value = str(value).strip()
-        # Remove common formatting characters (e.g., commas, spaces)
-        value = re.sub(r"[^\d.-]", "", value)
-        return value
+    @callback
+    def _async_sensor_index(self) -> dict[str, list[str]]:
+        """Return the candidate sensors of each field, indexed once per flow."""
+        if self._sensor_index is None:
+            self._sensor_index = _build_sensor_index(self.hass)
+        return self._sensor_index
 
     async def async_step_user(self, user_input=None):
         """Handle the initial step: sensor and device name selection."""
         _LOGGER.info("Starting Config Flow for Electricity Cost Calculator VN - Step 1")
         errors = {}
 
-        # Get all sensors from the entity registry
-        entity_registry = er.async_get(self.hass)
-        all_sensors = [
-            entry.entity_id
-            for entry in entity_registry.entities.values()
-            if entry.entity_id.startswith("sensor.")
-        ]
-
-        # Add a "None" option for optional fields
-        all_sensors.insert(0, None)
-
-        if not all_sensors[1:]:  # Check if there are any sensors (excluding None)
+        sensor_index = self._async_sensor_index()
+        if not any(sensor_index.values()):  # Check if there are any suitable sensors
             errors["base"] = "no_sensors"
 
         if user_input is not None:
             _LOGGER.info("Received user input (Step 1): %s", user_input)
-            # Validate that at least one sensor type is provided
-            if not (user_input.get(CONF_KWH_SENSOR) or user_input.get(CONF_POWER_SENSOR) or (user_input.get(CONF_CURRENT_SENSOR) and user_input.get(CONF_VOLTAGE_SENSOR))):
-                errors["base"] = "no_sensor_selected"
-            else:
-                # Validate the selected sensors
-                for sensor_type, sensor_id in [
-                    (CONF_KWH_SENSOR, user_input.get(CONF_KWH_SENSOR)),
-                    (CONF_POWER_SENSOR, user_input.get(CONF_POWER_SENSOR)),
-                    (CONF_CURRENT_SENSOR, user_input.get(CONF_CURRENT_SENSOR)),
-                    (CONF_VOLTAGE_SENSOR, user_input.get(CONF_VOLTAGE_SENSOR)),
-                ]:
-                    if sensor_id:
-                        state = self.hass.states.get(sensor_id)
-                        if state is None or state.state in ("unknown", "unavailable"):
-                            errors[sensor_type] = "invalid_sensor"
-                            break
+            # Validate that at least one sensor type is provided and the selected sensors exist
+            errors.update(_source_errors(self.hass, user_input))
+
+            # Validate the phase settings against the current and voltage sensors
+            if not errors and phase_config_error(user_input):
+                errors["base"] = "invalid_phases"
 
-                if not errors:
-                    # Store the user input from this step
-                    self._data.update(user_input)
-                    # Generate a default device name if none is provided
-                    device_name = self._data.get(CONF_DEVICE_NAME)
+            if not errors:
+                # Store the user input from this step
+                self._data.update(user_input)
+                # Generate a default device name if none is provided
+                device_name = self._data.get(CONF_DEVICE_NAME)
+                if not device_name:
+                    for sensor_id in [
+                        self._data.get(CONF_KWH_SENSOR),
+                        self._data.get(CONF_POWER_SENSOR),
+                        self._data.get(CONF_CURRENT_SENSOR),
+                        self._data.get(CONF_VOLTAGE_SENSOR),
+                    ]:
+                        if sensor_id:
+                            device_name = sensor_id.replace("sensor.", "").replace("_", " ").title()
+                            break
                     if not device_name:
-                        for sensor_id in [
-                            self._data.get(CONF_KWH_SENSOR),
-                            self._data.get(CONF_POWER_SENSOR),
-                            self._data.get(CONF_CURRENT_SENSOR),
-                            self._data.get(CONF_VOLTAGE_SENSOR),
-                        ]:
-                            if sensor_id:
-                                device_name = sensor_id.replace("sensor.", "").replace("_", " ").title()
-                                break
-                        if not device_name:
-                            device_name = "Electricity Cost Device"
-                    self._data[CONF_DEVICE_NAME] = device_name
-
-                    # Proceed to the pricing step
-                    return await self.async_step_pricing()
+                        device_name = "Electricity Cost Device"
+                self._data[CONF_DEVICE_NAME] = device_name
+
+                # Proceed to the pricing step
+                return await self.async_step_pricing()
 
         return self.async_show_form(
             step_id="user",
             data_schema=vol.Schema(
                 {
-                    vol.Optional(CONF_KWH_SENSOR): vol.In(all_sensors),
-                    vol.Optional(CONF_POWER_SENSOR): vol.In(all_sensors),
-                    vol.Optional(CONF_CURRENT_SENSOR): vol.In(all_sensors),
-                    vol.Optional(CONF_VOLTAGE_SENSOR): vol.In(all_sensors),
+                    vol.Optional(CONF_KWH_SENSOR): _sensor_selector(sensor_index, CONF_KWH_SENSOR),
+                    vol.Optional(CONF_POWER_SENSOR): _sensor_selector(sensor_index, CONF_POWER_SENSOR),
+                    vol.Optional(CONF_CURRENT_SENSOR): _sensor_selector(sensor_index, CONF_CURRENT_SENSOR),
+                    vol.Optional(CONF_VOLTAGE_SENSOR): _sensor_selector(sensor_index, CONF_VOLTAGE_SENSOR),
+                    vol.Optional(CONF_PHASES, default=DEFAULT_PHASES): vol.All(vol.Coerce(int), vol.In(PHASES)),
+                    vol.Optional(CONF_VOLTAGE_TYPE, default=DEFAULT_VOLTAGE_TYPE): vol.In(VOLTAGE_TYPES),
+                    vol.Optional(CONF_CURRENT_SENSOR_2): _sensor_selector(sensor_index, CONF_CURRENT_SENSOR_2),
+                    vol.Optional(CONF_CURRENT_SENSOR_3): _sensor_selector(sensor_index, CONF_CURRENT_SENSOR_3),
+                    vol.Optional(CONF_VOLTAGE_SENSOR_2): _sensor_selector(sensor_index, CONF_VOLTAGE_SENSOR_2),
+                    vol.Optional(CONF_VOLTAGE_SENSOR_3): _sensor_selector(sensor_index, CONF_VOLTAGE_SENSOR_3),
+                    vol.Optional(CONF_POWER_FACTOR_SENSOR): _sensor_selector(sensor_index, CONF_POWER_FACTOR_SENSOR),
                     vol.Optional(CONF_DEVICE_NAME): str,
+                    vol.Optional(CONF_INTEGRATION_METHOD, default=DEFAULT_INTEGRATION_METHOD): vol.In(INTEGRATION_METHODS),
+                    vol.Optional(CONF_MAX_SAMPLE_GAP, default=DEFAULT_MAX_SAMPLE_GAP): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(CONF_MAX_METER_JUMP, default=DEFAULT_MAX_METER_JUMP): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(CONF_METER_ROLLOVER, default=DEFAULT_METER_ROLLOVER): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(CONF_POWER_FACTOR, default=DEFAULT_POWER_FACTOR): vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False, max=1)),
+                    vol.Optional(CONF_IMPORT_STATISTICS, default=DEFAULT_IMPORT_STATISTICS): bool,
+                    vol.Optional(CONF_LOG_THROTTLE_WINDOW, default=DEFAULT_LOG_THROTTLE_WINDOW): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(CONF_MIN_PUBLISH_INTERVAL, default=DEFAULT_MIN_PUBLISH_INTERVAL): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(CONF_MAX_PUBLISH_INTERVAL, default=DEFAULT_MAX_PUBLISH_INTERVAL): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(CONF_PUBLISH_THRESHOLD, default=DEFAULT_PUBLISH_THRESHOLD): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(CONF_PUBLISH_RELATIVE_THRESHOLD, default=DEFAULT_PUBLISH_RELATIVE_THRESHOLD): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(CONF_INSTRUMENTATION, default=DEFAULT_INSTRUMENTATION): bool,
                 }
             ),
             errors=errors,
@@ -141,6 +421,9 @@ class ElectricityCostCalculatorVNConfigFlow(config_entries.ConfigFlow, domain=DO
                 CONF_TIER_5_RATE,
                 CONF_TIER_6_RATE,
                 CONF_VAT_RATE,
+                CONF_PEAK_RATE,
+                CONF_NORMAL_RATE,
+                CONF_OFF_PEAK_RATE,
             ]:
                 value = user_input.get(key)
                 # Skip validation for optional fields if not provided
@@ -150,7 +433,7 @@ class ElectricityCostCalculatorVNConfigFlow(config_entries.ConfigFlow, domain=DO
                     errors[key] = "missing_value"
                     continue
                 # Clean the input
-                cleaned_value = self._clean_numeric_input(value)
+                cleaned_value = clean_numeric_input(value)
                 try:
                     float_value = float(cleaned_value)
                     if float_value < 0:
@@ -179,6 +462,14 @@ class ElectricityCostCalculatorVNConfigFlow(config_entries.ConfigFlow, domain=DO
             if not cost_unit or str(cost_unit).strip() == "":
                 errors[CONF_COST_UNIT] = "empty_cost_unit"
 
+            # Validate the tier boundaries and rates together
+            if not errors:
+                try:
+                    build_tariff(user_input)
+                except (KeyError, ValueError, TypeError) as e:
+                    _LOGGER.error("Invalid tariff: %s", e)
+                    errors["base"] = "invalid_tariff"
+
             if not errors:
                 # Store the pricing data
                 self._data.update(user_input)
@@ -200,13 +491,40 @@ class ElectricityCostCalculatorVNConfigFlow(config_entries.ConfigFlow, domain=DO
                     vol.Optional(CONF_TIER_4_RATE, default=DEFAULT_TIER_4_RATE): str,
                     vol.Optional(CONF_TIER_5_RATE, default=DEFAULT_TIER_5_RATE): str,
                     vol.Optional(CONF_TIER_6_RATE, default=DEFAULT_TIER_6_RATE): str,
+                    vol.Optional(CONF_TIER_BOUNDARIES, default=_format_number_list(DEFAULT_TIER_BOUNDARIES)): str,
+                    vol.Optional(CONF_TIER_RATES, default=""): str,
+                    vol.Optional(CONF_TARIFF_MODE, default=DEFAULT_TARIFF_MODE): vol.In(TARIFF_MODES),
+                    vol.Optional(CONF_PEAK_RATE, default=""): str,
+                    vol.Optional(CONF_NORMAL_RATE, default=""): str,
+                    vol.Optional(CONF_OFF_PEAK_RATE, default=""): str,
                     vol.Required(CONF_VAT_RATE, default=DEFAULT_VAT_RATE): str,
                     vol.Required(CONF_COST_UNIT, default=DEFAULT_COST_UNIT): str,
+                    vol.Optional(CONF_BILLING_DAY, default=DEFAULT_BILLING_DAY): vol.All(vol.Coerce(int), vol.Range(min=1, max=31)),
+                    vol.Optional(CONF_BUDGET, default=DEFAULT_BUDGET): vol.All(vol.Coerce(float), vol.Range(min=0)),
                 }
             ),
             errors=errors,
         )
 
+    async def async_step_import(self, import_data):
+        """Create or update an entry from YAML configuration."""
+        existing_entry = await self.async_set_unique_id(import_data[CONF_DEVICE_NAME])
+        if existing_entry is not None:
+            _LOGGER.info("Updating the entry of %s from the YAML configuration", import_data[CONF_DEVICE_NAME])
+        if existing_entry is not None and CONF_TARIFF_HISTORY not in import_data:
+            # Keep the earlier tariff in effect for the consumption it already priced
+            import_data = {
+                **import_data,
+                CONF_TARIFF_HISTORY: append_tariff_version(
+                    entry_config(existing_entry), import_data, dt_util.now()
+                ),
+            }
+        self._abort_if_unique_id_configured(updates=import_data)
+        return self.async_create_entry(
+            title=import_data[CONF_DEVICE_NAME],
+            data=import_data,
+        )
+
     @staticmethod
     @callback
     def async_get_options_flow(config_entry):
@@ -217,29 +535,19 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
 
     def __init__(self, config_entry):
         self.config_entry = config_entry
+        # Options saved earlier take precedence over the original entry data
+        self._config = entry_config(config_entry)
+        self._sensor_index: dict[str, list[str]] | None = None
 
-    def _clean_numeric_input(self, value):
-        """Clean a numeric input by removing whitespace and common formatting characters."""
-        if value is None:
-            return None
-        # Convert to string and strip whitespace
-        value = str(value).strip()
-        # Remove common formatting characters (e.g., commas, spaces)
-        value = re.sub(r"[^\d.-]", "", value)
-        return value
+    @callback
+    def _async_sensor_index(self) -> dict[str, list[str]]:
+        """Return the candidate sensors of each field, indexed once per flow."""
+        if self._sensor_index is None:
+            self._sensor_index = _build_sensor_index(self.hass)
+        return self._sensor_index
 
     async def async_step_init(self, user_input=None):
         """Manage the options: sensors, device name, pricing, and cost unit."""
-        # Get all sensors from the entity registry
-        entity_registry = er.async_get(self.hass)
-        all_sensors = [
-            entry.entity_id
-            for entry in entity_registry.entities.values()
-            if entry.entity_id.startswith("sensor.")
-        ]
-
-        all_sensors.insert(0, None)
-
         if user_input is not None:
             # Validate the pricing inputs (ensure they are positive numbers)
             errors = {}
@@ -251,6 +559,9 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 CONF_TIER_5_RATE,
                 CONF_TIER_6_RATE,
                 CONF_VAT_RATE,
+                CONF_PEAK_RATE,
+                CONF_NORMAL_RATE,
+                CONF_OFF_PEAK_RATE,
             ]:
                 value = user_input.get(key)
                 # Skip validation for optional fields if not provided
@@ -260,7 +571,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     errors[key] = "missing_value"
                     continue
                 # Clean the input
-                cleaned_value = self._clean_numeric_input(value)
+                cleaned_value = clean_numeric_input(value)
                 try:
                     float_value = float(cleaned_value)
                     if float_value < 0:
@@ -289,65 +600,26 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             if not cost_unit or str(cost_unit).strip() == "":
                 errors[CONF_COST_UNIT] = "empty_cost_unit"
 
+            # Validate the tier boundaries and rates together
+            if not errors:
+                try:
+                    build_tariff(user_input)
+                except (KeyError, ValueError, TypeError) as e:
+                    _LOGGER.error("Invalid tariff: %s", e)
+                    errors["base"] = "invalid_tariff"
+
+            # A single-device entry needs a usable source, as in the config flow
+            if not errors and CONF_DEVICES not in self._config:
+                errors.update(_source_errors(self.hass, user_input))
+
+            # Validate the phase settings against the current and voltage sensors
+            if not errors and phase_config_error(user_input):
+                errors["base"] = "invalid_phases"
+
             if errors:
                 return self.async_show_form(
                     step_id="init",
-                    data_schema=vol.Schema(
-                        {
-                            vol.Optional(
-                                CONF_KWH_SENSOR,
-                                default=self.config_entry.data.get(CONF_KWH_SENSOR),
-                            ): vol.In(all_sensors),
-                            vol.Optional(
-                                CONF_POWER_SENSOR,
-                                default=self.config_entry.data.get(CONF_POWER_SENSOR),
-                            ): vol.In(all_sensors),
-                            vol.Optional(
-                                CONF_CURRENT_SENSOR,
-                                default=self.config_entry.data.get(CONF_CURRENT_SENSOR),
-                            ): vol.In(all_sensors),
-                            vol.Optional(
-                                CONF_VOLTAGE_SENSOR,
-                                default=self.config_entry.data.get(CONF_VOLTAGE_SENSOR),
-                            ): vol.In(all_sensors),
-                            vol.Optional(
-                                CONF_DEVICE_NAME,
-                                default=self.config_entry.data.get(CONF_DEVICE_NAME),
-                            ): str,
-                            vol.Required(
-                                CONF_TIER_1_RATE,
-                                default=self.config_entry.data.get(CONF_TIER_1_RATE, DEFAULT_TIER_1_RATE),
-                            ): str,
-                            vol.Optional(
-                                CONF_TIER_2_RATE,
-                                default=self.config_entry.data.get(CONF_TIER_2_RATE, DEFAULT_TIER_2_RATE),
-                            ): str,
-                            vol.Optional(
-                                CONF_TIER_3_RATE,
-                                default=self.config_entry.data.get(CONF_TIER_3_RATE, DEFAULT_TIER_3_RATE),
-                            ): str,
-                            vol.Optional(
-                                CONF_TIER_4_RATE,
-                                default=self.config_entry.data.get(CONF_TIER_4_RATE, DEFAULT_TIER_4_RATE),
-                            ): str,
-                            vol.Optional(
-                                CONF_TIER_5_RATE,
-                                default=self.config_entry.data.get(CONF_TIER_5_RATE, DEFAULT_TIER_5_RATE),
-                            ): str,
-                            vol.Optional(
-                                CONF_TIER_6_RATE,
-                                default=self.config_entry.data.get(CONF_TIER_6_RATE, DEFAULT_TIER_6_RATE),
-                            ): str,
-                            vol.Required(
-                                CONF_VAT_RATE,
-                                default=self.config_entry.data.get(CONF_VAT_RATE, DEFAULT_VAT_RATE),
-                            ): str,
-                            vol.Required(
-                                CONF_COST_UNIT,
-                                default=self.config_entry.data.get(CONF_COST_UNIT, DEFAULT_COST_UNIT),
-                            ): str,
-                        }
-                    ),
+                    data_schema=_options_schema(self._config, self._async_sensor_index()),
                     errors=errors,
                 )
 
@@ -367,64 +639,17 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     device_name = "Electricity Cost Device"
             user_input[CONF_DEVICE_NAME] = device_name
 
+            # A changed tariff only applies from now on
+            user_input[CONF_TARIFF_HISTORY] = append_tariff_version(self._config, user_input, dt_util.now())
+
+            # A cleared sensor field is left out of the input; store None so it overrides the entry data
+            if CONF_DEVICES not in self._config:
+                for field in SENSOR_FIELD_FILTERS:
+                    user_input.setdefault(field, None)
+
             return self.async_create_entry(title="", data=user_input)
 
         return self.async_show_form(
             step_id="init",
-            data_schema=vol.Schema(
-                {
-                    vol.Optional(
-                        CONF_KWH_SENSOR,
-                        default=self.config_entry.data.get(CONF_KWH_SENSOR),
-                    ): vol.In(all_sensors),
-                    vol.Optional(
-                        CONF_POWER_SENSOR,
-                        default=self.config_entry.data.get(CONF_POWER_SENSOR),
-                    ): vol.In(all_sensors),
-                    vol.Optional(
-                        CONF_CURRENT_SENSOR,
-                        default=self.config_entry.data.get(CONF_CURRENT_SENSOR),
-                    ): vol.In(all_sensors),
-                    vol.Optional(
-                        CONF_VOLTAGE_SENSOR,
-                        default=self.config_entry.data.get(CONF_VOLTAGE_SENSOR),
-                    ): vol.In(all_sensors),
-                    vol.Optional(
-                        CONF_DEVICE_NAME,
-                        default=self.config_entry.data.get(CONF_DEVICE_NAME),
-                    ): str,
-                    vol.Required(
-                        CONF_TIER_1_RATE,
-                        default=self.config_entry.data.get(CONF_TIER_1_RATE, DEFAULT_TIER_1_RATE),
-                    ): str,
-                    vol.Optional(
-                        CONF_TIER_2_RATE,
-                        default=self.config_entry.data.get(CONF_TIER_2_RATE, DEFAULT_TIER_2_RATE),
-                    ): str,
-                    vol.Optional(
-                        CONF_TIER_3_RATE,
-                        default=self.config_entry.data.get(CONF_TIER_3_RATE, DEFAULT_TIER_3_RATE),
-                    ): str,
-                    vol.Optional(
-                        CONF_TIER_4_RATE,
-                        default=self.config_entry.data.get(CONF_TIER_4_RATE, DEFAULT_TIER_4_RATE),
-                    ): str,
-                    vol.Optional(
-                        CONF_TIER_5_RATE,
-                        default=self.config_entry.data.get(CONF_TIER_5_RATE, DEFAULT_TIER_5_RATE),
-                    ): str,
-                    vol.Optional(
-                        CONF_TIER_6_RATE,
-                        default=self.config_entry.data.get(CONF_TIER_6_RATE, DEFAULT_TIER_6_RATE),
-                    ): str,
-                    vol.Required(
-                        CONF_VAT_RATE,
-                        default=self.config_entry.data.get(CONF_VAT_RATE, DEFAULT_VAT_RATE),
-                    ): str,
-                    vol.Required(
-                        CONF_COST_UNIT,
-                        default=self.config_entry.data.get(CONF_COST_UNIT, DEFAULT_COST_UNIT),
-                    ): str,
-                }
-            ),
+            data_schema=_options_schema(self._config, self._async_sensor_index()),
         )
\ No newline at end of file
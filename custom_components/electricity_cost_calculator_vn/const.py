@@ -6,12 +6,16 @@ CONF_POWER_SENSOR = "power_sensor"
 CONF_CURRENT_SENSOR = "current_sensor"
 CONF_VOLTAGE_SENSOR = "voltage_sensor"
 CONF_DEVICE_NAME = "device_name"
+CONF_DEVICES = "devices"  # Several devices sharing the tariff of one entry
+CONF_GROUPS = "groups"  # Group name -> device names priced together as one meter
 CONF_TIER_1_RATE = "tier_1_rate"  # 0–50 kWh
 CONF_TIER_2_RATE = "tier_2_rate"  # 51–100 kWh
 CONF_TIER_3_RATE = "tier_3_rate"  # 101–200 kWh
 CONF_TIER_4_RATE = "tier_4_rate"  # 201–300 kWh
 CONF_TIER_5_RATE = "tier_5_rate"  # 301–400 kWh
 CONF_TIER_6_RATE = "tier_6_rate"  # 401+ kWh
+CONF_TIER_BOUNDARIES = "tier_boundaries"  # Upper kWh bound of every tier but the last
+CONF_TIER_RATES = "tier_rates"  # Rate per tier, overrides the six tier rates above
 CONF_VAT_RATE = "vat_rate"  # VAT percentage
 CONF_COST_UNIT = "cost_unit"  # Currency unit for cost
 
@@ -22,9 +26,131 @@ DEFAULT_TIER_3_RATE = "2014"
 DEFAULT_TIER_4_RATE = "2536"
 DEFAULT_TIER_5_RATE = "2834"
 DEFAULT_TIER_6_RATE = "2927"
+DEFAULT_TIER_BOUNDARIES = [50, 100, 200, 300, 400]
 DEFAULT_VAT_RATE = "0.1"  # 10%
 DEFAULT_COST_UNIT = "VND"
 # Sensor types
 SENSOR_COST = "cost"
 SENSOR_COST_WITH_VAT = "cost_with_vat"
-SENSOR_KWH = "kwh"
\ No newline at end of file
+SENSOR_KWH = "kwh"
+SENSOR_FORECAST = "forecast"  # Projected end-of-cycle cost
+SENSOR_KWH_TODAY = "kwh_today"
+SENSOR_KWH_YESTERDAY = "kwh_yesterday"
+SENSOR_KWH_WEEK = "kwh_week"  # Since Monday midnight
+SENSOR_UPDATES = "updates"  # Diagnostic, only with instrumentation enabled
+SENSOR_UPDATE_TIME = "update_time"  # Diagnostic, only with instrumentation enabled
+
+# kWh meter readings
+CONF_MAX_METER_JUMP = "max_meter_jump"  # Largest plausible kWh between two readings, 0 = no limit
+DEFAULT_MAX_METER_JUMP = 100
+METER_JITTER = 0.001  # Drops up to this fraction of the reading are noise, not a reset
+CONF_METER_ROLLOVER = "meter_rollover"  # Reading at which the kWh meter wraps to 0 (e.g. 100000), 0 = unknown
+DEFAULT_METER_ROLLOVER = 0
+METER_ROLLOVER_MARGIN = 0.01  # A drop from within this fraction below the rollover reading is a rollover
+
+# Power integration (used when no kWh sensor is configured)
+CONF_INTEGRATION_METHOD = "integration_method"
+CONF_MAX_SAMPLE_GAP = "max_sample_gap"  # Seconds, 0 disables clamping
+INTEGRATION_METHOD_TRAPEZOIDAL = "trapezoidal"
+INTEGRATION_METHOD_LEFT = "left"
+INTEGRATION_METHODS = [INTEGRATION_METHOD_TRAPEZOIDAL, INTEGRATION_METHOD_LEFT]
+DEFAULT_INTEGRATION_METHOD = INTEGRATION_METHOD_TRAPEZOIDAL
+DEFAULT_MAX_SAMPLE_GAP = 0
+CONF_POWER_FACTOR = "power_factor"  # Converts apparent power (VA, kVA, V × A) to real power
+DEFAULT_POWER_FACTOR = 1.0
+CONF_POWER_FACTOR_SENSOR = "power_factor_sensor"  # Measured power factor, overrides the fixed one for VA, kVA and V × A
+
+# Three-phase current and voltage sources
+CONF_CURRENT_SENSOR_2 = "current_sensor_2"
+CONF_CURRENT_SENSOR_3 = "current_sensor_3"
+CONF_VOLTAGE_SENSOR_2 = "voltage_sensor_2"
+CONF_VOLTAGE_SENSOR_3 = "voltage_sensor_3"
+CONF_PHASES = "phases"
+PHASES = [1, 3]
+DEFAULT_PHASES = 1
+CONF_VOLTAGE_TYPE = "voltage_type"  # Whether voltage sensors measure line-to-neutral or line-to-line
+VOLTAGE_TYPE_LINE_TO_NEUTRAL = "line_to_neutral"
+VOLTAGE_TYPE_LINE_TO_LINE = "line_to_line"
+VOLTAGE_TYPES = [VOLTAGE_TYPE_LINE_TO_NEUTRAL, VOLTAGE_TYPE_LINE_TO_LINE]
+DEFAULT_VOLTAGE_TYPE = VOLTAGE_TYPE_LINE_TO_NEUTRAL
+
+# Billing cycle
+CONF_BILLING_DAY = "billing_day"  # Day of month the billing cycle resets
+DEFAULT_BILLING_DAY = 1
+
+# Tier and budget events
+CONF_BUDGET = "budget"  # Cost with VAT per billing cycle that fires an event when exceeded, 0 = off
+DEFAULT_BUDGET = 0
+EVENT_TIER_CHANGED = f"{DOMAIN}_tier_changed"
+EVENT_BUDGET_EXCEEDED = f"{DOMAIN}_budget_exceeded"
+TIER_HYSTERESIS = 0.5  # kWh below a tier boundary before the consumption counts as back in the lower tier
+BUDGET_HYSTERESIS = 0.01  # Fraction of the budget the cost must drop below it before it can be exceeded again
+
+# Forecast
+FORECAST_WINDOW = 7 * 24 * 3600  # Seconds of readings the consumption rate is averaged over
+FORECAST_SLOTS = 168  # Readings kept in the window, one per hour
+
+# Storage
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.checkpoints"  # One file with the meter and cycle state of every device
+STORAGE_SAVE_DELAY = 60  # Seconds to coalesce writes of the stored meter state
+DATA_CHECKPOINTS = f"{DOMAIN}_checkpoints"  # hass.data key of the shared checkpoint store
+
+# Long-term statistics
+CONF_IMPORT_STATISTICS = "import_statistics"  # Write hourly kWh and cost as external statistics
+DEFAULT_IMPORT_STATISTICS = False
+STATISTIC_ENERGY = "energy"
+STATISTIC_COST = "cost"
+
+# State write coalescing; the defaults write every update
+CONF_MIN_PUBLISH_INTERVAL = "min_publish_interval"  # Seconds between state writes, 0 = no minimum
+CONF_MAX_PUBLISH_INTERVAL = "max_publish_interval"  # Seconds after which a held-back change is written anyway, 0 = never
+CONF_PUBLISH_THRESHOLD = "publish_threshold"  # kWh change that is written right away, 0 = off
+CONF_PUBLISH_RELATIVE_THRESHOLD = "publish_relative_threshold"  # Fraction of the kWh that is written right away, 0 = off
+DEFAULT_MIN_PUBLISH_INTERVAL = 0
+DEFAULT_MAX_PUBLISH_INTERVAL = 0
+DEFAULT_PUBLISH_THRESHOLD = 0
+DEFAULT_PUBLISH_RELATIVE_THRESHOLD = 0
+PUBLISH_CONFIG_KEYS = [
+    CONF_MIN_PUBLISH_INTERVAL,
+    CONF_MAX_PUBLISH_INTERVAL,
+    CONF_PUBLISH_THRESHOLD,
+    CONF_PUBLISH_RELATIVE_THRESHOLD,
+]
+
+# Logging
+CONF_LOG_THROTTLE_WINDOW = "log_throttle_window"  # Seconds to suppress repeated source warnings
+DEFAULT_LOG_THROTTLE_WINDOW = 3600
+
+# Instrumentation
+CONF_INSTRUMENTATION = "instrumentation"  # Count updates and time the source reads and cost calculations
+DEFAULT_INSTRUMENTATION = False
+
+# Time-of-use tariff
+CONF_TARIFF_MODE = "tariff_mode"
+TARIFF_MODE_TIERED = "tiered"
+TARIFF_MODE_TIME_OF_USE = "time_of_use"
+TARIFF_MODES = [TARIFF_MODE_TIERED, TARIFF_MODE_TIME_OF_USE]
+DEFAULT_TARIFF_MODE = TARIFF_MODE_TIERED
+CONF_PEAK_RATE = "peak_rate"
+CONF_NORMAL_RATE = "normal_rate"
+CONF_OFF_PEAK_RATE = "off_peak_rate"
+CONF_TOU_SCHEDULE = "tou_schedule"  # Period -> list of {days, windows}; other times are normal
+CONF_HOLIDAYS = "holidays"  # "YYYY-MM-DD" or yearly "MM-DD" dates billed on the holiday schedule
+PERIOD_OFF_PEAK = "off_peak"
+PERIOD_NORMAL = "normal"
+PERIOD_PEAK = "peak"
+DAY_HOLIDAY = "holiday"
+# EVN schedule: peak 09:30–11:30 and 17:00–20:00 Monday to Saturday, off-peak 22:00–04:00 every day
+DEFAULT_TOU_SCHEDULE = {
+    PERIOD_PEAK: [
+        {"days": ["mon", "tue", "wed", "thu", "fri", "sat"], "windows": ["09:30-11:30", "17:00-20:00"]},
+    ],
+    PERIOD_OFF_PEAK: [
+        {"days": ["mon", "tue", "wed", "thu", "fri", "sat", "sun", DAY_HOLIDAY], "windows": ["22:00-04:00"]},
+    ],
+}
+
+# Tariff history
+CONF_TARIFF_HISTORY = "tariff_history"  # Tariff versions, each valid from its effective time
+CONF_EFFECTIVE_FROM = "effective_from"  # ISO timestamp, empty for the first version
@@ -0,0 +1,613 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_time, async_track_state_change_event, async_track_time_change
+from homeassistant.util import dt as dt_util, slugify
+import logging
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+from .const import (
+    CONF_KWH_SENSOR,
+    CONF_POWER_SENSOR,
+    CONF_CURRENT_SENSOR,
+    CONF_VOLTAGE_SENSOR,
+    CONF_DEVICE_NAME,
+    CONF_DEVICES,
+    CONF_GROUPS,
+    CONF_COST_UNIT,
+    CONF_INTEGRATION_METHOD,
+    CONF_MAX_SAMPLE_GAP,
+    DEFAULT_INTEGRATION_METHOD,
+    DEFAULT_MAX_SAMPLE_GAP,
+    CONF_BILLING_DAY,
+    DEFAULT_BILLING_DAY,
+    CONF_IMPORT_STATISTICS,
+    DEFAULT_IMPORT_STATISTICS,
+    CONF_LOG_THROTTLE_WINDOW,
+    DEFAULT_LOG_THROTTLE_WINDOW,
+    CONF_INSTRUMENTATION,
+    DEFAULT_INSTRUMENTATION,
+    CONF_POWER_FACTOR,
+    DEFAULT_POWER_FACTOR,
+    CONF_POWER_FACTOR_SENSOR,
+    CONF_PHASES,
+    CONF_VOLTAGE_TYPE,
+    CONF_BUDGET,
+    DEFAULT_BUDGET,
+    CONF_MAX_METER_JUMP,
+    DEFAULT_MAX_METER_JUMP,
+    CONF_METER_ROLLOVER,
+    DEFAULT_METER_ROLLOVER,
+    FORECAST_WINDOW,
+    FORECAST_SLOTS,
+)
+from .accumulator import EnergyAccumulator
+from .billing import cycle_start, next_cycle_start
+from .checkpoint import CheckpointStore
+from .cost_group import CostGroup
+from .forecast import ConsumptionForecast
+from .instrumentation import UpdateStats
+from .log_throttle import LogThrottle
+from .meter import METER_JUMP, MeterReadings
+from .normalize import CURRENT_UNITS, ENERGY_UNITS, POWER_FACTOR_UNITS, POWER_SOURCE_UNITS, VOLTAGE_UNITS, SourceSensor
+from .phases import CURRENT_SENSOR_KEYS, VOLTAGE_SENSOR_KEYS, phase_sensors, power_scale
+from .publish import PublishGate
+from .rollup import Rollups
+from .statistics import HourlyStatisticsWriter
+from .tariff import CycleCost, TariffHistory, TieredTariff, TimeOfUseTariff
+from .thresholds import CycleThresholds
+
+# Settings that change how the sources are read
+SOURCE_CONFIG_KEYS = [
+    CONF_KWH_SENSOR,
+    CONF_POWER_SENSOR,
+    *CURRENT_SENSOR_KEYS,
+    *VOLTAGE_SENSOR_KEYS,
+    CONF_POWER_FACTOR,
+    CONF_POWER_FACTOR_SENSOR,
+    CONF_PHASES,
+    CONF_VOLTAGE_TYPE,
+]
+
+def entry_config(entry: ConfigEntry) -> dict:
+    """Return the entry data with the saved options applied on top.
+
+    The options store None for a field that was cleared, which removes the
+    value from the entry data.
+    """
+    return {key: value for key, value in {**entry.data, **entry.options}.items() if value is not None}
+
+def device_configs(entry: ConfigEntry) -> list[tuple[str, dict]]:
+    """Return the unique key and config of every device of a config entry.
+
+    An entry either describes one device, keyed by the entry id, or holds a
+    list of devices that share the tariff and settings at the entry level.
+    """
+    config = entry_config(entry)
+    if CONF_DEVICES not in config:
+        return [(entry.entry_id, config)]
+    shared = {key: value for key, value in config.items() if key != CONF_DEVICES}
+    return [
+        (f"{entry.entry_id}_{slugify(device[CONF_DEVICE_NAME])}", {**shared, **device})
+        for device in config[CONF_DEVICES]
+    ]
+
+def group_keys(entry: ConfigEntry) -> dict[str, str]:
+    """Return the unique key of every cost group of a config entry by group name."""
+    return {name: f"{entry.entry_id}_group_{slugify(name)}" for name in entry_config(entry).get(CONF_GROUPS) or {}}
+
+def build_groups(hass: HomeAssistant, entry: ConfigEntry, coordinators: list["ElectricityCostCoordinator"], tariff_history: TariffHistory, checkpoints: CheckpointStore) -> list[CostGroup]:
+    """Create the cost groups of an entry and attach their member devices.
+
+    The members of a group share one billing cycle, so a group whose members
+    reset on different days is not created.
+    """
+    config = entry_config(entry)
+    by_name = {coordinator.device_name: coordinator for coordinator in coordinators}
+    groups = []
+    for name, key in group_keys(entry).items():
+        members = []
+        for member_name in config[CONF_GROUPS][name]:
+            if member_name not in by_name:
+                _LOGGER.error("Unknown device %s in group %s", member_name, name)
+                continue
+            members.append(by_name[member_name])
+        billing_days = {member.billing_day for member in members}
+        if len(billing_days) > 1:
+            _LOGGER.error("Devices in group %s have different billing days %s; the group is not created", name, sorted(billing_days))
+            continue
+        group = CostGroup(hass, entry, key, name, tariff_history, config, checkpoints)
+        for member in members:
+            group.async_add_member(member)
+        groups.append(group)
+    return groups
+
+@callback
+def async_track_rollovers(hass: HomeAssistant, coordinators: list["ElectricityCostCoordinator"]) -> CALLBACK_TYPE:
+    """Close the day and week buckets of all devices of an entry with one timer at midnight."""
+
+    @callback
+    def _async_rollover(now: datetime) -> None:
+        for coordinator in coordinators:
+            coordinator.async_rollover(now)
+
+    return async_track_time_change(hass, _async_rollover, hour=0, minute=0, second=0)
+
+@dataclass
+class ElectricityCostData:
+    """Runtime objects of one config entry."""
+
+    coordinators: list["ElectricityCostCoordinator"]
+    groups: list[CostGroup] = field(default_factory=list)
+
+class ElectricityCostCoordinator:
+    """Read the source sensors of one device and share the results with its entities."""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, key: str, config: dict, tariff_history: TariffHistory, checkpoints: CheckpointStore):
+        """Initialize the coordinator."""
+        self.hass = hass
+        self.entry = entry
+        self.key = key
+        self.config = config
+        self.device_name = config[CONF_DEVICE_NAME]
+        self._configure_sources(config)
+
+        # The tariff history is built once per entry and shared by all of its devices
+        self.tariff_history = tariff_history
+        self.cost_unit = config[CONF_COST_UNIT]
+
+        # Repeated warnings about the same source problem are suppressed for a while
+        self.log_throttle = LogThrottle(
+            _LOGGER,
+            float(config.get(CONF_LOG_THROTTLE_WINDOW, DEFAULT_LOG_THROTTLE_WINDOW)),
+        )
+
+        # Optional counters and timings of the work done per update
+        self.stats: UpdateStats | None = None
+        if config.get(CONF_INSTRUMENTATION, DEFAULT_INSTRUMENTATION):
+            self.stats = UpdateStats()
+
+        # kWh sources only add the valid deltas between readings, so meter resets and glitches are skipped
+        self.meter = MeterReadings(
+            float(config.get(CONF_MAX_METER_JUMP, DEFAULT_MAX_METER_JUMP) or 0),
+            float(config.get(CONF_METER_ROLLOVER, DEFAULT_METER_ROLLOVER) or 0),
+        )
+
+        # Power and current/voltage sources are integrated over time into energy
+        self.accumulator = EnergyAccumulator(
+            config.get(CONF_INTEGRATION_METHOD, DEFAULT_INTEGRATION_METHOD),
+            float(config.get(CONF_MAX_SAMPLE_GAP, DEFAULT_MAX_SAMPLE_GAP) or 0),
+        )
+
+        # Billing cycle: tiers apply to the consumption since the meter reading at cycle start
+        self.billing_day = int(config.get(CONF_BILLING_DAY, DEFAULT_BILLING_DAY))
+        self.cycle_start = cycle_start(dt_util.now(), self.billing_day)
+        self.cycle_baseline: float | None = None
+        self.meter_kwh = 0.0
+
+        # Recent consumption rate, used to project the consumption at the end of the cycle
+        self.forecast = ConsumptionForecast(FORECAST_WINDOW, FORECAST_SLOTS)
+
+        # Consumption and cost of today, yesterday and this week
+        self.rollups = Rollups(dt_util.now())
+
+        # Latest values shared by the kWh, cost and cost with VAT sensors
+        self.kwh = 0.0
+        self.cost = 0.0
+        self.cost_with_vat = 0.0
+        self.cycle_cost = CycleCost(tariff_history, dt_util.now())
+
+        # Events when the cycle consumption enters another tier or the cost exceeds the budget
+        self.thresholds = CycleThresholds(float(config.get(CONF_BUDGET, DEFAULT_BUDGET) or 0))
+
+        # Optional hourly import of kWh and cost deltas as long-term statistics
+        self.statistics: HourlyStatisticsWriter | None = None
+        if config.get(CONF_IMPORT_STATISTICS, DEFAULT_IMPORT_STATISTICS):
+            if "recorder" in hass.config.components:
+                self.statistics = HourlyStatisticsWriter(hass, key, self.device_name, self.cost_unit)
+            else:
+                _LOGGER.warning("Not importing statistics for %s because the recorder is not loaded", self.device_name)
+
+        # Groups that total this device's consumption with other devices
+        self.groups: list[CostGroup] = []
+
+        # Meter and cycle state are checkpointed with all other devices in one file
+        self.checkpoints = checkpoints
+        self._listeners: list[CALLBACK_TYPE] = []
+        # State writes are coalesced; the values above stay exact
+        self.publish_gate = PublishGate(hass, config, self._async_notify_listeners)
+        self._rebase_baseline = False
+        self._unsub_state_change: CALLBACK_TYPE | None = None
+        self._unsub_cycle_reset: CALLBACK_TYPE | None = None
+
+    def _configure_sources(self, config: dict) -> None:
+        """Create the source readers of the configured sensors."""
+        self.kwh_sensor = config.get(CONF_KWH_SENSOR)
+        self.power_sensor = config.get(CONF_POWER_SENSOR)
+        self.current_sensor = config.get(CONF_CURRENT_SENSOR)
+        self.voltage_sensor = config.get(CONF_VOLTAGE_SENSOR)
+
+        # Each source converts its value with a scale factor resolved from its unit
+        self.power_factor = float(config.get(CONF_POWER_FACTOR, DEFAULT_POWER_FACTOR))
+        self.kwh_source = SourceSensor(self.kwh_sensor, "kWh", ENERGY_UNITS) if self.kwh_sensor else None
+        self.power_source = SourceSensor(self.power_sensor, "Power", POWER_SOURCE_UNITS) if self.power_sensor else None
+
+        # Current and voltage per phase; the constant phase and line-to-line factors are folded into one scale
+        current_sensors, voltage_sensors = phase_sensors(config)
+        self.current_sources = [SourceSensor(entity_id, "Current", CURRENT_UNITS) for entity_id in current_sensors]
+        self.voltage_sources = [SourceSensor(entity_id, "Voltage", VOLTAGE_UNITS) for entity_id in voltage_sensors]
+        self.power_scale = power_scale(config)
+        power_factor_sensor = config.get(CONF_POWER_FACTOR_SENSOR)
+        self.power_factor_source = SourceSensor(power_factor_sensor, "Power factor", POWER_FACTOR_UNITS) if power_factor_sensor else None
+
+    @property
+    def source_entities(self) -> list[str]:
+        """Return the entity ids the values are calculated from."""
+        return [
+            source.entity_id
+            for source in (
+                self.kwh_source,
+                self.power_source,
+                *self.current_sources,
+                *self.voltage_sources,
+                self.power_factor_source,
+            )
+            if source is not None
+        ]
+
+    @property
+    def tariff(self) -> TieredTariff | TimeOfUseTariff:
+        """Return the tariff in effect."""
+        return self.cycle_cost.tariff
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Register an entity callback to run after every update."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    async def async_load(self) -> None:
+        """Restore the billing cycle baseline saved before the last shutdown."""
+        stored = await self.checkpoints.async_restore(self.key)
+        if not stored:
+            return
+        self.meter_kwh = stored["meter_kwh"]
+        self.accumulator.energy_kwh = stored["meter_kwh"]
+        # Before readings were tracked separately the meter total was the last reading
+        self.meter.restore(stored["meter_kwh"], stored.get("source_kwh", stored["meter_kwh"]))
+        self.forecast.restore(stored.get("forecast", []))
+        if "rollups" in stored:
+            self.rollups.restore(stored["rollups"], dt_util.now())
+        if self.statistics is not None and "statistics" in stored:
+            self.statistics.restore(stored["statistics"])
+        stored_cycle_start = dt_util.parse_datetime(stored["cycle_start"])
+        if stored_cycle_start is not None and stored_cycle_start >= self.cycle_start:
+            self.cycle_baseline = stored["cycle_baseline"]
+            # Continue the cycle where it stopped so the next update only adds its delta
+            self.kwh = max(self.meter_kwh - (self.cycle_baseline or 0.0), 0.0)
+            self.cost = stored.get("cycle_cost", 0.0)
+            self.cost_with_vat = stored.get("cycle_cost_with_vat", self.cost * (1 + self.tariff.vat_rate))
+            # Consumption so far keeps its price; later consumption uses the tariff in effect
+            self.cycle_cost.start(dt_util.now(), self.kwh, self.cost, self.cost_with_vat)
+        else:
+            # A reset was missed while stopped; the last known reading starts the new cycle
+            _LOGGER.info("Billing cycle of %s rolled over while stopped", self.device_name)
+            self.cycle_baseline = stored["meter_kwh"]
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the billing cycle state to persist."""
+        data = {
+            "cycle_start": self.cycle_start.isoformat(),
+            "cycle_baseline": self.cycle_baseline,
+            "meter_kwh": self.meter_kwh,
+            "source_kwh": self.meter.reading,
+            "cycle_cost": self.cost,
+            "cycle_cost_with_vat": self.cost_with_vat,
+            "forecast": self.forecast.as_list(),
+            "rollups": self.rollups.as_dict(),
+        }
+        if self.statistics is not None:
+            data["statistics"] = self.statistics.as_dict()
+        return data
+
+    @callback
+    def async_start(self) -> None:
+        """Compute the initial values and subscribe to the source sensors."""
+        self.async_refresh()
+        self._async_track_sources()
+        self._async_schedule_cycle_reset()
+
+    @callback
+    def _async_track_sources(self) -> None:
+        """Subscribe to state changes of the source sensors."""
+        if self.source_entities:
+            self._unsub_state_change = async_track_state_change_event(
+                self.hass, self.source_entities, self._async_source_changed
+            )
+
+    @callback
+    def async_reconfigure(self, config: dict, tariff_history: TariffHistory) -> None:
+        """Apply changed sources, settings and tariff without recreating the entities."""
+        previous_config = self.config
+        previous_sources = self.source_entities
+        self.config = config
+
+        # Swap in the new tariff; consumption so far keeps the price it was given
+        self.tariff_history = tariff_history
+        self.cycle_cost.history = tariff_history
+        self.cycle_cost.start(dt_util.now(), self.kwh, self.cost, self.cost_with_vat)
+
+        self.log_throttle.window = float(config.get(CONF_LOG_THROTTLE_WINDOW, DEFAULT_LOG_THROTTLE_WINDOW))
+        self.accumulator.method = config.get(CONF_INTEGRATION_METHOD, DEFAULT_INTEGRATION_METHOD)
+        self.accumulator.max_gap = float(config.get(CONF_MAX_SAMPLE_GAP, DEFAULT_MAX_SAMPLE_GAP) or 0)
+        self.meter.max_jump = float(config.get(CONF_MAX_METER_JUMP, DEFAULT_MAX_METER_JUMP) or 0)
+        self.meter.rollover = float(config.get(CONF_METER_ROLLOVER, DEFAULT_METER_ROLLOVER) or 0)
+        self.publish_gate.configure(config)
+
+        budget = float(config.get(CONF_BUDGET, DEFAULT_BUDGET) or 0)
+        if budget != self.thresholds.budget:
+            self.thresholds = CycleThresholds(budget)
+
+        billing_day = int(config.get(CONF_BILLING_DAY, DEFAULT_BILLING_DAY))
+        if billing_day != self.billing_day:
+            # The running cycle keeps its start; the new reset day applies from the next reset
+            self.billing_day = billing_day
+            if self._unsub_cycle_reset is not None:
+                self._unsub_cycle_reset()
+                self._async_schedule_cycle_reset()
+
+        # Only rebuild the readers and rebind the state listener if the sources themselves changed
+        if any(previous_config.get(key) != config.get(key) for key in SOURCE_CONFIG_KEYS):
+            self._configure_sources(config)
+        if self.source_entities != previous_sources:
+            _LOGGER.info("Sources of %s changed to %s", self.device_name, self.source_entities)
+            if self._unsub_state_change is not None:
+                self._unsub_state_change()
+                self._unsub_state_change = None
+            self._async_track_sources()
+            # A different meter has a different reading; keep the cycle consumption counted so far
+            self.meter.reading = None
+            self.accumulator.reset()
+            self.forecast = ConsumptionForecast(FORECAST_WINDOW, FORECAST_SLOTS)
+            self._rebase_baseline = True
+
+        self.async_refresh(force=True)
+
+    @callback
+    def async_stop(self) -> None:
+        """Unsubscribe from the source sensors and the cycle reset timer."""
+        if self._unsub_state_change is not None:
+            self._unsub_state_change()
+            self._unsub_state_change = None
+        if self._unsub_cycle_reset is not None:
+            self._unsub_cycle_reset()
+            self._unsub_cycle_reset = None
+        self.publish_gate.async_stop()
+
+    @callback
+    def _async_schedule_cycle_reset(self) -> None:
+        """Schedule the reset at the start of the next billing cycle."""
+        self._unsub_cycle_reset = async_track_point_in_time(
+            self.hass,
+            self._async_cycle_reset,
+            next_cycle_start(dt_util.now(), self.billing_day),
+        )
+
+    @callback
+    def _async_cycle_reset(self, now: datetime) -> None:
+        """Start a new billing cycle from the current meter reading."""
+        _LOGGER.info("Starting a new billing cycle for %s", self.device_name)
+        self.cycle_start = cycle_start(dt_util.as_local(now), self.billing_day)
+        self.cycle_baseline = self.meter_kwh
+        # The previous cycle's consumption is final; the new cycle starts from zero
+        self.kwh = 0.0
+        self.cost = 0.0
+        self.cost_with_vat = 0.0
+        self.cycle_cost.start(dt_util.now())
+        self.thresholds.reset(0.0, 0.0)
+        self.checkpoints.async_checkpoint(self.key, self._data_to_save)
+        self._async_publish(force=True)
+        self._async_schedule_cycle_reset()
+
+    @callback
+    def async_rollover(self, now: datetime) -> None:
+        """Start new day and week buckets."""
+        self.rollups.roll(dt_util.as_local(now))
+        self.checkpoints.async_checkpoint(self.key, self._data_to_save)
+        self.publish_gate.async_update(self.kwh, force=True)
+
+    @callback
+    def _async_source_changed(self, event: Event) -> None:
+        """Recalculate when a source sensor changes, as of the time of the change."""
+        new_state = event.data.get("new_state")
+        self.async_refresh(timestamp=new_state.last_updated.timestamp() if new_state is not None else None)
+
+    @callback
+    def async_refresh(self, force: bool = False, timestamp: float | None = None) -> None:
+        """Read the sources once and push the new values to all listeners; force skips write coalescing.
+
+        timestamp is the Unix time the source values were taken, now if not given.
+        """
+        if timestamp is None:
+            timestamp = dt_util.utcnow().timestamp()
+        stats = self.stats
+        if stats is not None:
+            stats.count("updates")
+            started = time.perf_counter()
+        if self.kwh_sensor:
+            reading = self.calculate_kwh()
+            source_available = reading is not None
+            meter_kwh = None
+            if reading is not None:
+                self._async_add_reading(reading)
+                meter_kwh = self.meter.total
+        else:
+            power_value = self.calculate_power()
+            source_available = power_value is not None
+            if power_value is None:
+                self.accumulator.reset()
+            else:
+                self.accumulator.add_sample(power_value, timestamp)
+            meter_kwh = self.accumulator.energy_kwh
+        if stats is not None:
+            stats.time("read_source", time.perf_counter() - started)
+            if not source_available:
+                stats.count("source_unavailable")
+
+        if meter_kwh is not None:
+            self.meter_kwh = meter_kwh
+            self.forecast.add(timestamp, meter_kwh)
+            if self.cycle_baseline is None:
+                # No stored baseline yet: count consumption from now on
+                self.cycle_baseline = meter_kwh
+            elif self._rebase_baseline:
+                # The source changed: continue the cycle from the new meter's reading
+                self.cycle_baseline = meter_kwh - self.kwh
+                self._rebase_baseline = False
+            self.checkpoints.async_checkpoint(self.key, self._data_to_save)
+        self._async_publish(force)
+
+    @callback
+    def _async_add_reading(self, reading: float) -> None:
+        """Add the delta of a kWh reading to the meter total, reporting resets, rollovers and jumps."""
+        previous = self.meter.reading
+        anomaly = self.meter.add(reading)
+        if anomaly is None:
+            return
+        if self.stats is not None:
+            self.stats.count(f"meter_{anomaly}")
+        if anomaly == METER_JUMP:
+            self.log_throttle.warning(
+                self.kwh_sensor,
+                anomaly,
+                "Skipped an implausible jump of kWh sensor %s from %s to %s",
+                self.kwh_sensor,
+                previous,
+                reading,
+            )
+        else:
+            _LOGGER.info("kWh sensor %s had a meter %s from %s to %s", self.kwh_sensor, anomaly, previous, reading)
+
+    @callback
+    def _async_publish(self, force: bool = False) -> None:
+        """Recalculate the cycle consumption and costs and notify all listeners."""
+        previous_kwh = self.kwh
+        previous_cost = self.cost
+        previous_cost_with_vat = self.cost_with_vat
+        self.kwh = max(self.meter_kwh - (self.cycle_baseline or 0.0), 0.0)
+        stats = self.stats
+        if stats is not None:
+            started = time.perf_counter()
+        # Each part of the cycle is priced with the tariff in effect when it was used
+        self.cycle_cost.update(self.kwh, dt_util.now())
+        self.cost = self.cycle_cost.cost
+        self.cost_with_vat = self.cycle_cost.cost_with_vat
+        if stats is not None:
+            stats.time("cost_calculation", time.perf_counter() - started)
+        self.rollups.add(self.kwh - previous_kwh, self.cost - previous_cost, self.cost_with_vat - previous_cost_with_vat)
+        if self.statistics is not None:
+            self.statistics.async_add(self.kwh - previous_kwh, self.cost - previous_cost)
+        events = self.thresholds.update(self.tariff, self.kwh, self.cost_with_vat)
+        if events is not None:
+            for event_type, event_data in events:
+                _LOGGER.info("%s: %s %s", self.device_name, event_type, event_data)
+                self.hass.bus.async_fire(event_type, {"entry_id": self.entry.entry_id, "device_name": self.device_name, **event_data})
+        for group in self.groups:
+            group.async_member_updated(self)
+        self.publish_gate.async_update(self.kwh, force)
+
+    @callback
+    def _async_notify_listeners(self) -> None:
+        """Run all entity callbacks."""
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def projected_cycle(self) -> tuple[float, float, float] | None:
+        """Return the projected kWh, cost and cost with VAT at the end of the cycle, or None without enough history."""
+        now = dt_util.now()
+        cycle_end = next_cycle_start(self.cycle_start, self.billing_day)
+        projected_kwh = self.forecast.projected_kwh(self.kwh, now.timestamp(), cycle_end.timestamp())
+        if projected_kwh is None:
+            return None
+        tariff = self.tariff
+        if isinstance(tariff, TimeOfUseTariff):
+            # The remaining consumption is priced at the average price of the cycle so far
+            if self.kwh <= 0:
+                return None
+            extra_cost = (projected_kwh - self.kwh) * self.cost / self.kwh
+        else:
+            extra_cost = tariff.cost(projected_kwh) - tariff.cost(self.kwh)
+        return (
+            projected_kwh,
+            self.cost + extra_cost,
+            self.cost_with_vat + extra_cost * (1 + tariff.vat_rate),
+        )
+
+    def calculate_kwh(self) -> float | None:
+        """Calculate the meter reading (kWh) from the configured kWh sensor, or None if unavailable."""
+        if self.kwh_source is None:
+            self.log_throttle.warning(self.device_name, "no_sensor", "No kWh sensor provided for device %s", self.device_name)
+            return None
+        return self.kwh_source.read(self.hass, self.log_throttle)
+
+    def calculate_power(self) -> float | None:
+        """Calculate the power (W) from the configured sensors, or None if unavailable."""
+        # If a power sensor is provided, use it (apparent power is scaled by the power factor)
+        if self.power_source is not None:
+            power_value = self.power_source.read(self.hass, self.log_throttle)
+            if power_value is not None and self.power_source.apparent:
+                power_value *= self.calculate_power_factor()
+            return power_value
+
+        # If current (A) and voltage (V) sensors are provided, calculate power
+        if self.current_sources and self.voltage_sources:
+            apparent_power = 0.0
+            if len(self.voltage_sources) == 1:
+                voltage_value = self.voltage_sources[0].read(self.hass, self.log_throttle)
+                if voltage_value is None:
+                    return None
+                for current_source in self.current_sources:
+                    current_value = current_source.read(self.hass, self.log_throttle)
+                    if current_value is None:
+                        return None
+                    apparent_power += current_value
+                apparent_power *= voltage_value
+            else:
+                for current_source, voltage_source in zip(self.current_sources, self.voltage_sources):
+                    current_value = current_source.read(self.hass, self.log_throttle)
+                    voltage_value = voltage_source.read(self.hass, self.log_throttle)
+                    if current_value is None or voltage_value is None:
+                        return None
+                    apparent_power += voltage_value * current_value
+            # Power (W) = Voltage (V) * Current (A) * power factor, summed over the phases
+            return apparent_power * self.power_scale * self.calculate_power_factor()
+
+        self.log_throttle.warning(self.device_name, "no_sensor", "No valid sensor provided for device %s", self.device_name)
+        return None
+
+    def calculate_power_factor(self) -> float:
+        """Return the measured power factor, or the configured one if there is no usable reading."""
+        if self.power_factor_source is None:
+            return self.power_factor
+        power_factor = self.power_factor_source.read(self.hass, self.log_throttle)
+        if power_factor is None:
+            return self.power_factor
+        if not 0 < power_factor <= 1:
+            self.log_throttle.warning(
+                self.power_factor_source.entity_id,
+                "range",
+                "Power factor sensor %s is out of range: %s",
+                self.power_factor_source.entity_id,
+                power_factor,
+            )
+            return self.power_factor
+        return power_factor
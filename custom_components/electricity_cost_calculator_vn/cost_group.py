@@ -0,0 +1,201 @@
+from datetime import datetime
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+from .checkpoint import CheckpointStore
+from .const import (
+    CONF_COST_UNIT,
+    CONF_BUDGET,
+    DEFAULT_BUDGET,
+)
+from .publish import PublishGate
+from .tariff import CycleCost, TariffHistory, TieredTariff, TimeOfUseTariff
+from .thresholds import CycleThresholds
+
+class CostGroup:
+    """Total the cycle consumption of several devices and price the total once.
+
+    Tiered pricing applies to the whole meter, so the group cost is the tariff
+    applied to the summed consumption, not the sum of the member costs. Time-of-use
+    prices do not depend on the total, so there the member costs are summed. Each
+    member update adjusts the totals by its own change, so updates are O(1) no
+    matter how many members the group has.
+
+    The totals and each member's part of them are checkpointed like a device,
+    so after a restart the consumption so far keeps the price it was given.
+
+    The members start a new billing cycle one after another. Until the last
+    of them has, the group keeps the totals of the previous cycle, so a total
+    never mixes two cycles; the new cycle then starts from the members' new
+    consumption without reporting tier or budget crossings.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, key: str, name: str, tariff_history: TariffHistory, config: dict, checkpoints: CheckpointStore):
+        """Initialize the group with the cost unit, budget and publish settings of the entry config."""
+        self.hass = hass
+        self.entry = entry
+        self.key = key
+        self.device_name = name
+        self.cost_unit = config[CONF_COST_UNIT]
+        self.members: list = []
+        self.cycle_start: datetime | None = None
+
+        self.kwh = 0.0
+        self.cost = 0.0
+        self.cost_with_vat = 0.0
+        self.cycle_cost = CycleCost(tariff_history, dt_util.now())
+        self.thresholds = CycleThresholds(float(config.get(CONF_BUDGET, DEFAULT_BUDGET) or 0))
+
+        self._member_kwh: dict[str, float] = {}
+        self._member_cost: dict[str, float] = {}
+        self._listeners: list[CALLBACK_TYPE] = []
+        self.checkpoints = checkpoints
+        # State writes are coalesced; the totals above stay exact
+        self.publish_gate = PublishGate(hass, config, self._async_notify_listeners)
+
+    @property
+    def tariff(self) -> TieredTariff | TimeOfUseTariff:
+        """Return the tariff in effect."""
+        return self.cycle_cost.tariff
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Register an entity callback to run after every update."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_add_member(self, coordinator) -> None:
+        """Add a device coordinator to the group."""
+        self.members.append(coordinator)
+        coordinator.groups.append(self)
+        self._member_kwh[coordinator.key] = 0.0
+        self._member_cost[coordinator.key] = 0.0
+        if self.cycle_start is None:
+            self.cycle_start = coordinator.cycle_start
+
+    async def async_load(self) -> None:
+        """Restore the totals of the current cycle saved before the last shutdown."""
+        stored = await self.checkpoints.async_restore(self.key)
+        if not stored or dt_util.parse_datetime(stored["cycle_start"]) != self.cycle_start:
+            # Nothing stored, or the cycle rolled over while stopped and the members start from zero
+            return
+        for key in self._member_kwh:
+            self._member_kwh[key] = stored["member_kwh"].get(key, 0.0)
+            self._member_cost[key] = stored["member_cost"].get(key, 0.0)
+        self.kwh = stored["kwh"]
+        self.cost = stored["cost"]
+        self.cost_with_vat = stored["cost_with_vat"]
+        # Consumption so far keeps its price; later consumption uses the tariff in effect
+        self.cycle_cost.start(dt_util.now(), self.kwh, self.cost, self.cost_with_vat)
+        self.thresholds.reset(self.kwh, self.cost_with_vat)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the cycle totals to persist."""
+        return {
+            "cycle_start": self.cycle_start.isoformat() if self.cycle_start is not None else None,
+            "kwh": self.kwh,
+            "cost": self.cost,
+            "cost_with_vat": self.cost_with_vat,
+            "member_kwh": dict(self._member_kwh),
+            "member_cost": dict(self._member_cost),
+        }
+
+    @callback
+    def async_member_updated(self, coordinator) -> None:
+        """Apply the change of one member's cycle consumption to the total."""
+        if coordinator.cycle_start != self.cycle_start:
+            # The member is in a new cycle; its values count once all members are
+            self._async_start_cycle(coordinator.cycle_start)
+            return
+        previous_kwh = self._member_kwh[coordinator.key]
+        previous_cost = self._member_cost[coordinator.key]
+        if coordinator.kwh == previous_kwh and coordinator.cost == previous_cost:
+            return
+        self._member_kwh[coordinator.key] = coordinator.kwh
+        self._member_cost[coordinator.key] = coordinator.cost
+        self.kwh = max(self.kwh + coordinator.kwh - previous_kwh, 0.0)
+        now = dt_util.now()
+        self.cycle_cost.update(self.kwh, now)
+        if isinstance(self.tariff, TimeOfUseTariff):
+            self.cost += coordinator.cost - previous_cost
+            self.cost_with_vat = self.cost * (1 + self.tariff.vat_rate)
+        else:
+            self.cost = self.cycle_cost.cost
+            self.cost_with_vat = self.cycle_cost.cost_with_vat
+        events = self.thresholds.update(self.tariff, self.kwh, self.cost_with_vat)
+        if events is not None:
+            for event_type, event_data in events:
+                _LOGGER.info("%s: %s %s", self.device_name, event_type, event_data)
+                self.hass.bus.async_fire(event_type, {"entry_id": self.entry.entry_id, "device_name": self.device_name, **event_data})
+        self.checkpoints.async_checkpoint(self.key, self._data_to_save)
+        self.publish_gate.async_update(self.kwh)
+
+    @callback
+    def _async_start_cycle(self, cycle_start: datetime) -> None:
+        """Start the group's new billing cycle once every member has started it."""
+        if any(member.cycle_start != cycle_start for member in self.members):
+            return
+        _LOGGER.info("Starting a new billing cycle for group %s", self.device_name)
+        self.cycle_start = cycle_start
+        for member in self.members:
+            self._member_kwh[member.key] = member.kwh
+            self._member_cost[member.key] = member.cost
+        self.kwh = sum(self._member_kwh.values())
+        # A new billing cycle prices the total from scratch
+        self.cycle_cost.start(dt_util.now())
+        self.cycle_cost.update(self.kwh, dt_util.now())
+        if isinstance(self.tariff, TimeOfUseTariff):
+            self.cost = sum(self._member_cost.values())
+            self.cost_with_vat = self.cost * (1 + self.tariff.vat_rate)
+        else:
+            self.cost = self.cycle_cost.cost
+            self.cost_with_vat = self.cycle_cost.cost_with_vat
+        self.thresholds.reset(self.kwh, self.cost_with_vat)
+        self.checkpoints.async_checkpoint(self.key, self._data_to_save)
+        self.publish_gate.async_update(self.kwh, force=True)
+
+    @callback
+    def async_reconfigure(self, tariff_history: TariffHistory, config: dict) -> None:
+        """Apply a new tariff history, budget and publish settings; the cost so far keeps the price it was given."""
+        budget = float(config.get(CONF_BUDGET, DEFAULT_BUDGET) or 0)
+        if budget != self.thresholds.budget:
+            self.thresholds = CycleThresholds(budget)
+        self.publish_gate.configure(config)
+        self.cycle_cost.history = tariff_history
+        self.cycle_cost.start(dt_util.now(), self.kwh, self.cost, self.cost_with_vat)
+        self.async_refresh()
+
+    @callback
+    def async_refresh(self) -> None:
+        """Push the current totals to all listeners right away."""
+        self.publish_gate.async_update(self.kwh, force=True)
+
+    @callback
+    def _async_notify_listeners(self) -> None:
+        """Run all entity callbacks."""
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel the scheduled state write."""
+        self.publish_gate.async_stop()
+
+    def share(self, member_key: str) -> float:
+        """Return the part of the group cost (without VAT) attributed to a member."""
+        if isinstance(self.tariff, TimeOfUseTariff):
+            return self._member_cost.get(member_key, 0.0)
+        if self.kwh <= 0:
+            return 0.0
+        return self.cost * self._member_kwh.get(member_key, 0.0) / self.kwh
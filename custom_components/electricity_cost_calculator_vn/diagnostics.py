@@ -0,0 +1,37 @@
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import ElectricityCostData
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return diagnostics for a config entry."""
+    data: ElectricityCostData = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "entry_data": dict(entry.data),
+        "devices": {
+            coordinator.key: {
+                "device_name": coordinator.device_name,
+                "log_throttle": coordinator.log_throttle.as_dict(),
+                "stats": coordinator.stats.as_dict() if coordinator.stats is not None else None,
+            }
+            for coordinator in data.coordinators
+        },
+        # Devices with instrumentation enabled, the most updated first
+        "busiest_devices": [
+            coordinator.key
+            for coordinator in sorted(
+                (coordinator for coordinator in data.coordinators if coordinator.stats is not None),
+                key=lambda coordinator: coordinator.stats.counters.get("updates", 0),
+                reverse=True,
+            )
+        ],
+        "groups": {
+            group.key: {
+                "name": group.device_name,
+                "members": [member.key for member in group.members],
+                "kwh": group.kwh,
+            }
+            for group in data.groups
+        },
+    }
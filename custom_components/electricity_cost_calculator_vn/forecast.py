@@ -0,0 +1,55 @@
+from collections import deque
+
+class ConsumptionForecast:
+    """Rolling consumption rate of a meter, used to project the end-of-cycle consumption.
+
+    Meter readings are kept in a ring buffer of at most `slots` entries, at
+    most one per window / slots seconds, so the buffer spans the same window
+    however often the source updates. Adding a reading and reading the rate
+    are O(1).
+    """
+
+    __slots__ = ("window", "_interval", "_readings", "_latest")
+
+    def __init__(self, window: float, slots: int):
+        """Initialize an empty forecast over window seconds."""
+        self.window = window
+        self._interval = window / slots
+        self._readings: deque[tuple[float, float]] = deque(maxlen=slots)
+        self._latest: tuple[float, float] | None = None
+
+    def add(self, timestamp: float, meter_kwh: float) -> None:
+        """Add a meter reading taken at a Unix timestamp."""
+        if self._latest is not None and (meter_kwh < self._latest[1] or timestamp < self._latest[0]):
+            # The meter was reset or replaced; earlier readings no longer compare
+            self._readings.clear()
+        self._latest = (timestamp, meter_kwh)
+        if not self._readings or timestamp - self._readings[-1][0] >= self._interval:
+            self._readings.append(self._latest)
+
+    def rate(self) -> float | None:
+        """Return the consumption rate in kWh per second, or None until one slot of history exists."""
+        if not self._readings:
+            return None
+        oldest_timestamp, oldest_kwh = self._readings[0]
+        latest_timestamp, latest_kwh = self._latest
+        elapsed = latest_timestamp - oldest_timestamp
+        if elapsed < self._interval:
+            return None
+        return (latest_kwh - oldest_kwh) / elapsed
+
+    def projected_kwh(self, cycle_kwh: float, now: float, cycle_end: float) -> float | None:
+        """Return the cycle consumption expected at cycle_end if the current rate continues."""
+        rate = self.rate()
+        if rate is None:
+            return None
+        return cycle_kwh + rate * max(cycle_end - now, 0.0)
+
+    def as_list(self) -> list[list[float]]:
+        """Return the buffered readings for storage."""
+        return [list(reading) for reading in self._readings]
+
+    def restore(self, readings: list[list[float]]) -> None:
+        """Refill the buffer from stored readings."""
+        for timestamp, meter_kwh in readings:
+            self.add(timestamp, meter_kwh)
@@ -0,0 +1,72 @@
+from bisect import bisect_left
+
+# Upper bounds (ms) of the timing histogram buckets; the last bucket is open-ended
+TIMING_BUCKETS_MS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25]
+
+class Timing:
+    """Histogram of the durations of one operation."""
+
+    __slots__ = ("count", "total", "maximum", "buckets")
+
+    def __init__(self):
+        """Initialize an empty histogram."""
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.buckets = [0] * (len(TIMING_BUCKETS_MS) + 1)
+
+    def add(self, seconds: float) -> None:
+        """Add one duration."""
+        milliseconds = seconds * 1000
+        self.count += 1
+        self.total += milliseconds
+        if milliseconds > self.maximum:
+            self.maximum = milliseconds
+        self.buckets[bisect_left(TIMING_BUCKETS_MS, milliseconds)] += 1
+
+    @property
+    def mean(self) -> float:
+        """Return the mean duration in ms."""
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self) -> dict:
+        """Return the histogram with its bucket bounds."""
+        bounds = [f"<={bound}ms" for bound in TIMING_BUCKETS_MS] + [f">{TIMING_BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean, 4),
+            "max_ms": round(self.maximum, 4),
+            "buckets": dict(zip(bounds, self.buckets)),
+        }
+
+class UpdateStats:
+    """Counters and timings of the work one device does.
+
+    Only created when instrumentation is enabled; callers check for None, so a
+    disabled device pays a single attribute test per update.
+    """
+
+    __slots__ = ("counters", "timings")
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        self.counters: dict[str, int] = {}
+        self.timings: dict[str, Timing] = {}
+
+    def count(self, name: str) -> None:
+        """Increment a counter."""
+        self.counters[name] = self.counters.get(name, 0) + 1
+
+    def time(self, name: str, seconds: float) -> None:
+        """Add a duration to a timing histogram."""
+        timing = self.timings.get(name)
+        if timing is None:
+            timing = self.timings[name] = Timing()
+        timing.add(seconds)
+
+    def as_dict(self) -> dict:
+        """Return all counters and timing histograms."""
+        return {
+            "counters": dict(self.counters),
+            "timings": {name: timing.as_dict() for name, timing in self.timings.items()},
+        }
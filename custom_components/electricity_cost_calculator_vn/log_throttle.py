@@ -0,0 +1,46 @@
+import logging
+import time
+
+class LogThrottle:
+    """Rate-limit repeated warnings about the same source.
+
+    The first warning for a source is logged, as is any change of problem
+    (e.g. unavailable -> negative value). Identical repeats within the window
+    are only counted, so neither the message is formatted nor a line written.
+    """
+
+    def __init__(self, logger: logging.Logger, window: float):
+        """Initialize the throttle."""
+        self._logger = logger
+        self.window = window
+        # Per source: (problem key, monotonic time logged, repeats suppressed since)
+        self._last: dict[str, tuple[str, float, int]] = {}
+        self.suppressed: dict[str, int] = {}
+
+    def warning(self, source: str, key: str, msg: str, *args) -> None:
+        """Log a warning about source unless the same problem was logged recently."""
+        now = time.monotonic()
+        last = self._last.get(source)
+        if last is not None and last[0] == key and now - last[1] < self.window:
+            self._last[source] = (key, last[1], last[2] + 1)
+            self.suppressed[source] = self.suppressed.get(source, 0) + 1
+            return
+        if last is not None and last[2]:
+            self._logger.warning(msg + " (previous warning repeated %s more times)", *args, last[2])
+        else:
+            self._logger.warning(msg, *args)
+        self._last[source] = (key, now, 0)
+
+    def recovered(self, source: str) -> None:
+        """Note that source is valid again, so its next problem is logged immediately."""
+        last = self._last.pop(source, None)
+        if last is not None:
+            self._logger.info("Sensor %s is valid again (%s repeated warnings suppressed)", source, last[2])
+
+    def as_dict(self) -> dict:
+        """Return the current problems and suppressed message counters."""
+        return {
+            "window": self.window,
+            "active_problems": {source: last[0] for source, last in self._last.items()},
+            "suppressed": dict(self.suppressed),
+        }
@@ -0,0 +1,91 @@
+from .const import (
+    METER_JITTER,
+    METER_ROLLOVER_MARGIN,
+)
+
+# Anomalies reported by MeterReadings.add
+METER_RESET = "reset"
+METER_ROLLOVER = "rollover"
+METER_JUMP = "jump"
+METER_STEP = "step"
+
+class MeterReadings:
+    """Total of the valid consumption deltas between readings of a cumulative kWh meter.
+
+    Each reading only adds its difference to the previous one, so the total
+    survives a meter that restarts from zero, wraps around at its maximum or
+    briefly reports a wrong value:
+
+    * a drop of at most METER_JITTER of the reading is noise and is ignored;
+    * a larger drop from just below the rollover reading of the meter, when
+      it is known, is a rollover, and the consumption up to the wrap and
+      since it is added;
+    * any other larger drop is a reset, and the new reading is the
+      consumption since the reset;
+    * a rise of more than max_jump kWh is implausible and is skipped, keeping
+      the previous reading as the reference; only if the next reading agrees
+      with it is the meter taken to have stepped to a new level, and counting
+      continues from there. The first reading after restore is not checked,
+      since the meter may have run for any time since the stored reading.
+
+    The total starts at the first reading, so it matches the meter until the
+    first anomaly.
+    """
+
+    __slots__ = ("max_jump", "rollover", "total", "reading", "_jumped_to", "_restored")
+
+    def __init__(self, max_jump: float, rollover: float = 0):
+        """Initialize the meter; max_jump is the largest plausible delta in kWh and rollover the wrapping reading, 0 for none."""
+        self.max_jump = max_jump
+        self.rollover = rollover
+        self.total: float | None = None
+        self.reading: float | None = None
+        self._jumped_to: float | None = None
+        self._restored = False
+
+    def restore(self, total: float, reading: float | None) -> None:
+        """Continue from a stored total and the last reading of the source."""
+        self.total = total
+        self.reading = reading
+        self._jumped_to = None
+        self._restored = True
+
+    def add(self, reading: float) -> str | None:
+        """Add a reading to the total and return the anomaly it showed, if any."""
+        previous = self.reading
+        restored = self._restored
+        self._restored = False
+        if previous is None:
+            # First reading, or the source was replaced: it is the new reference
+            self.reading = reading
+            if self.total is None:
+                self.total = reading
+            return None
+        delta = reading - previous
+        anomaly = None
+        if delta < 0:
+            if -delta <= previous * METER_JITTER:
+                # Keep the higher reading so the recovery is not counted twice
+                self._jumped_to = None
+                return None
+            wrap = self.rollover
+            if wrap and 0 <= wrap - previous <= wrap * METER_ROLLOVER_MARGIN:
+                delta = wrap - previous + reading
+                anomaly = METER_ROLLOVER
+            else:
+                delta = reading
+                anomaly = METER_RESET
+        if self.max_jump and delta > self.max_jump and not restored:
+            jumped_to = self._jumped_to
+            if jumped_to is not None and 0 <= reading - jumped_to <= self.max_jump:
+                # Two readings agree on the new level: count on from the first of them
+                self._jumped_to = None
+                self.reading = reading
+                self.total += reading - jumped_to
+                return METER_STEP
+            self._jumped_to = reading
+            return METER_JUMP
+        self._jumped_to = None
+        self.reading = reading
+        self.total += delta
+        return anomaly
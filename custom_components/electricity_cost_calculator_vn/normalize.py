@@ -0,0 +1,89 @@
+import re
+
+from .log_throttle import LogThrottle
+
+# Scale factors from each supported unit (lowercase) to kWh, W, A and V
+ENERGY_UNITS = {
+    "kwh": 1.0,
+    "wh": 0.001,
+    "mwh": 1000.0,
+    "mj": 0.277778,  # 1 MJ = 0.277778 kWh
+    "gj": 277.778,  # 1 GJ = 277.778 kWh
+}
+POWER_UNITS = {
+    "w": 1.0,
+    "kw": 1000.0,
+}
+APPARENT_POWER_UNITS = {
+    "va": 1.0,
+    "kva": 1000.0,
+}
+CURRENT_UNITS = {
+    "a": 1.0,
+    "ma": 0.001,
+}
+VOLTAGE_UNITS = {
+    "v": 1.0,
+    "kv": 1000.0,
+}
+POWER_FACTOR_UNITS = {
+    "": 1.0,
+    "%": 0.01,
+}
+# A power sensor may report real (W) or apparent power (VA), both scaled to the base unit
+POWER_SOURCE_UNITS = {**POWER_UNITS, **APPARENT_POWER_UNITS}
+
+def clean_numeric_input(value) -> str | None:
+    """Clean a numeric input by removing whitespace and common formatting characters."""
+    if value is None:
+        return None
+    # Convert to string and strip whitespace
+    value = str(value).strip()
+    # Remove common formatting characters (e.g., commas, spaces)
+    return re.sub(r"[^\d.-]", "", value)
+
+class SourceSensor:
+    """A numeric source sensor read in a fixed target unit.
+
+    The unit attribute is resolved to a scale factor once and only looked up
+    again when it changes, so a read costs one float() and one multiply.
+    apparent tells whether the last value read was apparent power, which still
+    has to be multiplied by a power factor.
+    """
+
+    __slots__ = ("entity_id", "label", "units", "apparent", "_unit", "_factor")
+
+    def __init__(self, entity_id: str, label: str, units: dict[str, float]):
+        """Initialize the source."""
+        self.entity_id = entity_id
+        self.label = label
+        self.units = units
+        self.apparent = False
+        self._unit: str | None = None
+        self._factor: float | None = None
+
+    def read(self, hass, log_throttle: LogThrottle) -> float | None:
+        """Return the current value in the target unit, or None if it is unusable."""
+        state = hass.states.get(self.entity_id)
+        if state is None or state.state in ("unknown", "unavailable"):
+            log_throttle.warning(self.entity_id, "unavailable", "%s sensor %s is unavailable", self.label, self.entity_id)
+            return None
+        try:
+            value = float(state.state)
+        except (ValueError, TypeError):
+            log_throttle.warning(self.entity_id, "invalid", "Invalid %s value from sensor %s: %s", self.label, self.entity_id, state.state)
+            return None
+        if value < 0:
+            log_throttle.warning(self.entity_id, "negative", "%s sensor %s returned a negative value: %s", self.label, self.entity_id, value)
+            return None
+        unit = state.attributes.get("unit_of_measurement")
+        if unit != self._unit:
+            self._unit = unit
+            unit_key = str(unit or "").lower()
+            self._factor = self.units.get(unit_key)
+            self.apparent = unit_key in APPARENT_POWER_UNITS
+        if self._factor is None:
+            log_throttle.warning(self.entity_id, "unit", "Unsupported unit for %s sensor %s: %s", self.label, self.entity_id, unit)
+            return None
+        log_throttle.recovered(self.entity_id)
+        return value * self._factor
@@ -0,0 +1,68 @@
+from math import sqrt
+
+from .const import (
+    CONF_CURRENT_SENSOR,
+    CONF_CURRENT_SENSOR_2,
+    CONF_CURRENT_SENSOR_3,
+    CONF_VOLTAGE_SENSOR,
+    CONF_VOLTAGE_SENSOR_2,
+    CONF_VOLTAGE_SENSOR_3,
+    CONF_PHASES,
+    PHASES,
+    DEFAULT_PHASES,
+    CONF_VOLTAGE_TYPE,
+    VOLTAGE_TYPES,
+    VOLTAGE_TYPE_LINE_TO_LINE,
+    DEFAULT_VOLTAGE_TYPE,
+)
+
+CURRENT_SENSOR_KEYS = [CONF_CURRENT_SENSOR, CONF_CURRENT_SENSOR_2, CONF_CURRENT_SENSOR_3]
+VOLTAGE_SENSOR_KEYS = [CONF_VOLTAGE_SENSOR, CONF_VOLTAGE_SENSOR_2, CONF_VOLTAGE_SENSOR_3]
+
+def phase_sensors(config) -> tuple[list[str], list[str]]:
+    """Return the configured current and voltage sensors, in phase order."""
+    return (
+        [config[key] for key in CURRENT_SENSOR_KEYS if config.get(key)],
+        [config[key] for key in VOLTAGE_SENSOR_KEYS if config.get(key)],
+    )
+
+def phase_config_error(config) -> str | None:
+    """Return why the current and voltage sensors do not fit the phase settings, or None."""
+    try:
+        phases = int(config.get(CONF_PHASES, DEFAULT_PHASES))
+    except (ValueError, TypeError):
+        return f"{CONF_PHASES} must be one of {PHASES}"
+    if phases not in PHASES:
+        return f"{CONF_PHASES} must be one of {PHASES}"
+    voltage_type = config.get(CONF_VOLTAGE_TYPE, DEFAULT_VOLTAGE_TYPE)
+    if voltage_type not in VOLTAGE_TYPES:
+        return f"{CONF_VOLTAGE_TYPE} must be one of {VOLTAGE_TYPES}"
+    currents, voltages = phase_sensors(config)
+    if phases == 1:
+        if len(currents) > 1 or len(voltages) > 1:
+            return f"sensors for more than one phase need {CONF_PHASES}: 3"
+        if voltage_type == VOLTAGE_TYPE_LINE_TO_LINE:
+            return f"line-to-line voltage needs {CONF_PHASES}: 3"
+        return None
+    if len(currents) not in (1, 3):
+        return "three-phase needs one current sensor (balanced load) or one per phase"
+    if len(voltages) not in (1, len(currents)):
+        return "three-phase needs one voltage sensor or one per current sensor"
+    return None
+
+def power_scale(config) -> float:
+    """Return the constant factor that turns the measured V × A into the total power.
+
+    With a single current sensor on three phases the load is taken as balanced,
+    so the measured phase counts three times. Line-to-line voltages are
+    converted to line-to-neutral by dividing by √3, so a balanced load gives
+    the familiar √3 × V(LL) × I.
+    """
+    scale = 1.0
+    if int(config.get(CONF_PHASES, DEFAULT_PHASES)) == 3:
+        currents, _ = phase_sensors(config)
+        if len(currents) == 1:
+            scale *= 3
+        if config.get(CONF_VOLTAGE_TYPE, DEFAULT_VOLTAGE_TYPE) == VOLTAGE_TYPE_LINE_TO_LINE:
+            scale /= sqrt(3)
+    return scale
@@ -0,0 +1,118 @@
+from datetime import datetime
+from math import inf
+import time
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    CONF_MIN_PUBLISH_INTERVAL,
+    CONF_MAX_PUBLISH_INTERVAL,
+    CONF_PUBLISH_THRESHOLD,
+    CONF_PUBLISH_RELATIVE_THRESHOLD,
+    DEFAULT_MIN_PUBLISH_INTERVAL,
+    DEFAULT_MAX_PUBLISH_INTERVAL,
+    DEFAULT_PUBLISH_THRESHOLD,
+    DEFAULT_PUBLISH_RELATIVE_THRESHOLD,
+)
+
+class PublishGate:
+    """Decide which updates of a device or group are written to its entities.
+
+    The values are always kept exact; only the state writes are coalesced. An
+    update is written when its kWh changed by at least the absolute or the
+    relative threshold since the last write and the minimum interval has
+    passed. A held-back change is written when the minimum interval ends, if
+    it is significant, or otherwise once the maximum interval has passed, by
+    the next update or by a timer if no update comes. With the default
+    settings every update is written.
+    """
+
+    def __init__(self, hass: HomeAssistant, config: dict, notify: CALLBACK_TYPE):
+        """Initialize the gate; notify writes the states of all entities."""
+        self.hass = hass
+        self._notify = notify
+        self.configure(config)
+        self._value: float | None = None
+        self._time = 0.0
+        self._pending: float | None = None
+        self._flush_at = inf
+        self._unsub_flush: CALLBACK_TYPE | None = None
+
+    def configure(self, config: dict) -> None:
+        """Apply the publish settings of a device or entry config."""
+        self.min_interval = float(config.get(CONF_MIN_PUBLISH_INTERVAL, DEFAULT_MIN_PUBLISH_INTERVAL) or 0)
+        self.max_interval = float(config.get(CONF_MAX_PUBLISH_INTERVAL, DEFAULT_MAX_PUBLISH_INTERVAL) or 0)
+        self.threshold = float(config.get(CONF_PUBLISH_THRESHOLD, DEFAULT_PUBLISH_THRESHOLD) or 0)
+        self.relative_threshold = float(config.get(CONF_PUBLISH_RELATIVE_THRESHOLD, DEFAULT_PUBLISH_RELATIVE_THRESHOLD) or 0)
+        self.enabled = bool(self.min_interval or self.threshold or self.relative_threshold)
+
+    @callback
+    def async_update(self, value: float, force: bool = False) -> None:
+        """Write the entity states for a new kWh value, or hold the write back."""
+        now = time.monotonic()
+        if self.enabled and not force and self._value is not None:
+            delay = self._hold(value, now)
+            if delay is not None:
+                self._pending = value
+                if delay != inf:
+                    self._async_schedule_flush(now + delay)
+                return
+        self._async_write(value, now)
+
+    def _hold(self, value: float, now: float) -> float | None:
+        """Return the seconds until value should be written, inf for no deadline, or None to write now."""
+        elapsed = now - self._time
+        if self.max_interval and elapsed >= self.max_interval:
+            return None
+        if self.threshold or self.relative_threshold:
+            change = abs(value - self._value)
+            significant = (self.threshold and change >= self.threshold) or (
+                self.relative_threshold and change >= self.relative_threshold * abs(self._value)
+            )
+        else:
+            significant = True
+        if significant and elapsed >= self.min_interval:
+            return None
+        if significant:
+            return self.min_interval - elapsed
+        return self.max_interval - elapsed if self.max_interval else inf
+
+    @callback
+    def _async_write(self, value: float, now: float) -> None:
+        """Record the written value and notify the entities."""
+        self._value = value
+        self._time = now
+        self._pending = None
+        self._async_cancel_flush()
+        self._notify()
+
+    @callback
+    def _async_schedule_flush(self, flush_at: float) -> None:
+        """Write the held-back value at flush_at unless a write is already due earlier."""
+        if flush_at >= self._flush_at:
+            return
+        self._async_cancel_flush()
+        self._flush_at = flush_at
+        self._unsub_flush = async_call_later(self.hass, max(flush_at - time.monotonic(), 0), self._async_flush)
+
+    @callback
+    def _async_flush(self, now: datetime) -> None:
+        """Write the value held back since the last write."""
+        self._unsub_flush = None
+        self._flush_at = inf
+        if self._pending is not None:
+            self._async_write(self._pending, time.monotonic())
+
+    @callback
+    def _async_cancel_flush(self) -> None:
+        """Cancel the scheduled write."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        self._flush_at = inf
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel the scheduled write when the entry is unloaded."""
+        self._async_cancel_flush()
@@ -0,0 +1,375 @@
+"""Replay exported meter readings through the tariff to produce per-cycle bills.
+
+Runs outside Home Assistant, e.g. on a history export from the recorder:
+
+    python custom_components/electricity_cost_calculator_vn/replay.py history.csv --tariff tariff.json --workers 4
+"""
+import argparse
+import csv
+from datetime import datetime, timezone
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import types
+import zlib
+from zoneinfo import ZoneInfo
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, only needed for Parquet input
+    pq = None
+
+_LOGGER = logging.getLogger(__name__)
+
+if not __package__:
+    # Run as a script: load the hass-free modules without the integration's __init__
+    _package = types.ModuleType("electricity_cost_calculator_vn")
+    _package.__path__ = [os.path.dirname(os.path.abspath(__file__))]
+    sys.modules.setdefault("electricity_cost_calculator_vn", _package)
+    __package__ = "electricity_cost_calculator_vn"
+
+from .const import (
+    CONF_TIER_1_RATE,
+    CONF_TIER_2_RATE,
+    CONF_TIER_3_RATE,
+    CONF_TIER_4_RATE,
+    CONF_TIER_5_RATE,
+    CONF_TIER_6_RATE,
+    CONF_TIER_BOUNDARIES,
+    CONF_VAT_RATE,
+    CONF_BILLING_DAY,
+    CONF_MAX_METER_JUMP,
+    CONF_METER_ROLLOVER,
+    DEFAULT_TIER_1_RATE,
+    DEFAULT_TIER_2_RATE,
+    DEFAULT_TIER_3_RATE,
+    DEFAULT_TIER_4_RATE,
+    DEFAULT_TIER_5_RATE,
+    DEFAULT_TIER_6_RATE,
+    DEFAULT_TIER_BOUNDARIES,
+    DEFAULT_VAT_RATE,
+    DEFAULT_BILLING_DAY,
+    DEFAULT_MAX_METER_JUMP,
+    DEFAULT_METER_ROLLOVER,
+)
+from .accumulator import EnergyAccumulator
+from .billing import cycle_start, next_cycle_start
+from .meter import MeterReadings
+from .tariff import CycleCost, TariffHistory
+
+SOURCE_KWH = "kwh"  # Readings are cumulative meter values in kWh
+SOURCE_POWER = "power"  # Readings are power samples in W, integrated over time
+SOURCES = [SOURCE_KWH, SOURCE_POWER]
+
+DEFAULT_COLUMNS = ("entity_id", "last_changed", "state")  # Columns of a recorder history export
+READ_CHUNK_ROWS = 50_000  # Rows read and routed to the workers at a time
+QUEUE_CHUNKS = 4  # Chunks buffered per worker before the reader waits
+
+BILL_FIELDS = ["device", "cycle_start", "kwh", "cost", "cost_with_vat"]
+
+DEFAULT_TARIFF = {
+    CONF_TIER_1_RATE: DEFAULT_TIER_1_RATE,
+    CONF_TIER_2_RATE: DEFAULT_TIER_2_RATE,
+    CONF_TIER_3_RATE: DEFAULT_TIER_3_RATE,
+    CONF_TIER_4_RATE: DEFAULT_TIER_4_RATE,
+    CONF_TIER_5_RATE: DEFAULT_TIER_5_RATE,
+    CONF_TIER_6_RATE: DEFAULT_TIER_6_RATE,
+    CONF_TIER_BOUNDARIES: DEFAULT_TIER_BOUNDARIES,
+    CONF_VAT_RATE: DEFAULT_VAT_RATE,
+}
+
+def read_chunks(path: str, columns: tuple[str, str, str] = DEFAULT_COLUMNS, chunk_rows: int = READ_CHUNK_ROWS):
+    """Yield lists of (device, timestamp, value) rows from a CSV or Parquet file.
+
+    Only one chunk is held in memory at a time.
+    """
+    if path.endswith(".parquet"):
+        if pq is None:
+            raise RuntimeError("Reading Parquet files requires pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=list(columns)):
+            yield list(zip(*(batch.column(index).to_pylist() for index in range(len(columns)))))
+        return
+
+    with open(path, newline="", encoding="utf-8") as csv_file:
+        reader = csv.reader(csv_file)
+        header = next(reader, None) or []
+        try:
+            indexes = [header.index(column) for column in columns]
+        except ValueError as e:
+            raise ValueError(f"Missing column in {path}: {e}") from e
+        device_index, time_index, value_index = indexes
+        chunk = []
+        for row in reader:
+            chunk.append((row[device_index], row[time_index], row[value_index]))
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+class DeviceReplay:
+    """Billing state of one device while its readings are replayed in time order.
+
+    Only the running cycle is kept, so memory use does not grow with the
+    number of readings.
+    """
+
+    __slots__ = (
+        "device",
+        "history",
+        "billing_day",
+        "accumulator",
+        "meter",
+        "bills",
+        "skipped",
+        "_last_moment",
+        "_cycle_start",
+        "_next_cycle_start",
+        "_cycle_kwh",
+        "_cycle_cost",
+    )
+
+    def __init__(self, device: str, history: TariffHistory, billing_day: int, source: str, max_meter_jump: float = DEFAULT_MAX_METER_JUMP, meter_rollover: float = DEFAULT_METER_ROLLOVER):
+        """Initialize the device state."""
+        self.device = device
+        self.history = history
+        self.billing_day = billing_day
+        self.accumulator = EnergyAccumulator() if source == SOURCE_POWER else None
+        # Meter readings are cleaned of resets, rollovers and jumps like the sensors do
+        self.meter = MeterReadings(max_meter_jump, meter_rollover)
+        self.bills: list[tuple] = []
+        self.skipped = 0
+        self._last_moment: datetime | None = None
+        self._cycle_start: datetime | None = None
+        self._next_cycle_start: datetime | None = None
+        self._cycle_kwh = 0.0
+        self._cycle_cost: CycleCost | None = None
+
+    def add_reading(self, moment: datetime, value: float | None) -> None:
+        """Add a reading, or None for an unavailable source."""
+        if self._last_moment is not None and moment < self._last_moment:
+            # Readings must be in time order per device
+            self.skipped += 1
+            return
+        if value is None:
+            self.skipped += 1
+            if self.accumulator is not None:
+                self.accumulator.reset()
+            return
+        if self._cycle_start is None or moment >= self._next_cycle_start:
+            self._close_cycle()
+            self._cycle_start = cycle_start(moment, self.billing_day)
+            self._next_cycle_start = next_cycle_start(moment, self.billing_day)
+            self._cycle_kwh = 0.0
+            self._cycle_cost = CycleCost(self.history, self._cycle_start)
+
+        if self.accumulator is not None:
+            delta = self.accumulator.add_sample(value, moment.timestamp())
+        else:
+            # The first reading is the baseline
+            previous_total = self.meter.total if self.meter.total is not None else value
+            self.meter.add(value)
+            delta = self.meter.total - previous_total
+        self._last_moment = moment
+        self._cycle_kwh += delta
+        self._cycle_cost.update(self._cycle_kwh, moment)
+
+    def _close_cycle(self) -> None:
+        """Record the bill of the running cycle."""
+        if self._cycle_start is None:
+            return
+        self.bills.append(
+            (
+                self.device,
+                self._cycle_start.isoformat(),
+                round(self._cycle_kwh, 3),
+                round(self._cycle_cost.cost),
+                round(self._cycle_cost.cost_with_vat),
+            )
+        )
+
+    def finish(self) -> list[tuple]:
+        """Close the running cycle and return all bills of the device."""
+        self._close_cycle()
+        self._cycle_start = None
+        return self.bills
+
+class BillReplay:
+    """Replay the readings of any number of devices with one tariff configuration."""
+
+    def __init__(self, tariff_data: dict, billing_day: int, source: str, time_zone: str | None):
+        """Initialize the replay."""
+        self.history = TariffHistory.from_config(tariff_data)
+        self.billing_day = billing_day
+        self.source = source
+        self.max_meter_jump = float(tariff_data.get(CONF_MAX_METER_JUMP, DEFAULT_MAX_METER_JUMP) or 0)
+        self.meter_rollover = float(tariff_data.get(CONF_METER_ROLLOVER, DEFAULT_METER_ROLLOVER) or 0)
+        self.time_zone = ZoneInfo(time_zone) if time_zone else datetime.now().astimezone().tzinfo
+        self.devices: dict[str, DeviceReplay] = {}
+        self.invalid = 0
+
+    def add_rows(self, rows) -> None:
+        """Add (device, timestamp, value) rows; timestamps are ISO strings or datetimes."""
+        devices = self.devices
+        time_zone = self.time_zone
+        for device, timestamp, value in rows:
+            replay = devices.get(device)
+            if replay is None:
+                replay = devices[device] = DeviceReplay(device, self.history, self.billing_day, self.source, self.max_meter_jump, self.meter_rollover)
+            try:
+                moment = timestamp if isinstance(timestamp, datetime) else datetime.fromisoformat(timestamp)
+            except (ValueError, TypeError):
+                self.invalid += 1
+                continue
+            if moment.tzinfo is None:
+                moment = moment.replace(tzinfo=time_zone)
+            # Billing cycles start at local midnight
+            moment = moment.astimezone(time_zone)
+            try:
+                number = float(value)
+                if number < 0:
+                    number = None
+            except (ValueError, TypeError):
+                # "unknown", "unavailable" and empty states
+                number = None
+            replay.add_reading(moment, number)
+
+    def finish(self) -> tuple[list[tuple], int]:
+        """Return the bills of all devices and the number of rows skipped."""
+        bills = []
+        skipped = self.invalid
+        for replay in self.devices.values():
+            bills.extend(replay.finish())
+            skipped += replay.skipped
+        return bills, skipped
+
+def _replay_worker(chunks, results, tariff_data: dict, billing_day: int, source: str, time_zone: str | None) -> None:
+    """Replay the chunks routed to one worker process until None arrives."""
+    replay = BillReplay(tariff_data, billing_day, source, time_zone)
+    while (chunk := chunks.get()) is not None:
+        replay.add_rows(chunk)
+    results.put(replay.finish())
+
+def replay_file(
+    path: str,
+    tariff_data: dict,
+    billing_day: int = DEFAULT_BILLING_DAY,
+    source: str = SOURCE_KWH,
+    time_zone: str | None = None,
+    workers: int = 1,
+    columns: tuple[str, str, str] = DEFAULT_COLUMNS,
+    chunk_rows: int = READ_CHUNK_ROWS,
+) -> tuple[list[tuple], int]:
+    """Replay a readings file and return the per-cycle bills and the number of rows skipped.
+
+    With several workers, every device is routed to one worker process by a
+    hash of its id, so its readings stay in order. The queues to the workers
+    are bounded, so the reader never runs more than a few chunks ahead.
+    """
+    if source not in SOURCES:
+        raise ValueError(f"Unsupported source: {source}")
+    if workers <= 1:
+        replay = BillReplay(tariff_data, billing_day, source, time_zone)
+        for chunk in read_chunks(path, columns, chunk_rows):
+            replay.add_rows(chunk)
+        bills, skipped = replay.finish()
+        return sorted(bills), skipped
+
+    context = multiprocessing.get_context()
+    queues = [context.Queue(QUEUE_CHUNKS) for _ in range(workers)]
+    results = context.Queue()
+    processes = [
+        context.Process(
+            target=_replay_worker,
+            args=(queue, results, tariff_data, billing_day, source, time_zone),
+            daemon=True,
+        )
+        for queue in queues
+    ]
+    for process in processes:
+        process.start()
+
+    routes: dict[str, int] = {}
+    try:
+        for chunk in read_chunks(path, columns, chunk_rows):
+            parts = [[] for _ in range(workers)]
+            for row in chunk:
+                worker = routes.get(row[0])
+                if worker is None:
+                    worker = routes[row[0]] = zlib.crc32(str(row[0]).encode()) % workers
+                parts[worker].append(row)
+            for queue, part in zip(queues, parts):
+                if part:
+                    queue.put(part)
+    finally:
+        for queue in queues:
+            queue.put(None)
+
+    bills = []
+    skipped = 0
+    # Collect the results before joining so no worker blocks on a full result pipe
+    for _ in processes:
+        worker_bills, worker_skipped = results.get()
+        bills.extend(worker_bills)
+        skipped += worker_skipped
+    for process in processes:
+        process.join()
+    return sorted(bills), skipped
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the command line interface."""
+    parser = argparse.ArgumentParser(description="Compute per-cycle electricity bills from exported readings.")
+    parser.add_argument("path", help="CSV or Parquet file of timestamped readings")
+    parser.add_argument("--tariff", help="JSON file with the tariff settings of the integration (default: EVN residential)")
+    parser.add_argument("--billing-day", type=int, help="Day of month the billing cycle resets")
+    parser.add_argument("--source", choices=SOURCES, default=SOURCE_KWH, help="Whether readings are kWh meter values or W power samples")
+    parser.add_argument("--timezone", help="Time zone of the billing cycles (default: local)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    parser.add_argument("--columns", nargs=3, default=DEFAULT_COLUMNS, metavar=("DEVICE", "TIME", "VALUE"), help="Column names of the input")
+    parser.add_argument("--chunk-rows", type=int, default=READ_CHUNK_ROWS, help="Rows read per chunk")
+    parser.add_argument("--output", help="CSV file for the bills (default: stdout)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    tariff_data = dict(DEFAULT_TARIFF)
+    if args.tariff:
+        with open(args.tariff, encoding="utf-8") as tariff_file:
+            tariff_data.update(json.load(tariff_file))
+    billing_day = args.billing_day or int(tariff_data.get(CONF_BILLING_DAY, DEFAULT_BILLING_DAY))
+    if not 1 <= billing_day <= 31:
+        parser.error(f"Invalid billing day: {billing_day} (must be between 1 and 31)")
+
+    started = datetime.now(timezone.utc)
+    bills, skipped = replay_file(
+        args.path,
+        tariff_data,
+        billing_day,
+        args.source,
+        args.timezone,
+        args.workers,
+        tuple(args.columns),
+        args.chunk_rows,
+    )
+
+    output = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        writer = csv.writer(output)
+        writer.writerow(BILL_FIELDS)
+        writer.writerows(bills)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    _LOGGER.info(
+        "Computed %s bills in %.1f s, skipped %s rows",
+        len(bills),
+        (datetime.now(timezone.utc) - started).total_seconds(),
+        skipped,
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
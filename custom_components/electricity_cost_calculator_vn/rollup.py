@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+def day_start(moment: datetime) -> datetime:
+    """Return midnight of the day that contains moment."""
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def week_start(moment: datetime) -> datetime:
+    """Return midnight of the Monday of the week that contains moment."""
+    return day_start(moment) - timedelta(days=moment.weekday())
+
+class Bucket:
+    """Consumption and cost summed over one period."""
+
+    __slots__ = ("start", "kwh", "cost", "cost_with_vat")
+
+    def __init__(self, start: datetime, kwh: float = 0.0, cost: float = 0.0, cost_with_vat: float = 0.0):
+        """Initialize the bucket of the period starting at start."""
+        self.start = start
+        self.kwh = kwh
+        self.cost = cost
+        self.cost_with_vat = cost_with_vat
+
+    def add(self, kwh: float, cost: float, cost_with_vat: float) -> None:
+        """Add the consumption and cost of one update."""
+        self.kwh += kwh
+        self.cost += cost
+        self.cost_with_vat += cost_with_vat
+
+    def as_dict(self) -> dict:
+        """Return the bucket for storage."""
+        return {"start": self.start.isoformat(), "kwh": self.kwh, "cost": self.cost, "cost_with_vat": self.cost_with_vat}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Bucket":
+        """Rebuild a stored bucket."""
+        return cls(datetime.fromisoformat(data["start"]), data["kwh"], data["cost"], data["cost_with_vat"])
+
+class Rollups:
+    """Today's, yesterday's and this week's consumption and cost of one device.
+
+    Every update adds its delta to the open day and week buckets, so it costs
+    the same whatever the time. The buckets are closed by a timer at
+    midnight rather than by checking the date on every update.
+    """
+
+    __slots__ = ("today", "yesterday", "week")
+
+    def __init__(self, now: datetime):
+        """Initialize empty buckets for the periods containing now."""
+        self.today = Bucket(day_start(now))
+        self.yesterday = Bucket(self.today.start - timedelta(days=1))
+        self.week = Bucket(week_start(now))
+
+    def add(self, kwh: float, cost: float, cost_with_vat: float) -> None:
+        """Add the consumption and cost of one update to the open buckets."""
+        self.today.add(kwh, cost, cost_with_vat)
+        self.week.add(kwh, cost, cost_with_vat)
+
+    def roll(self, now: datetime) -> None:
+        """Close the buckets of the periods that ended before now."""
+        start = day_start(now)
+        if start == self.today.start:
+            return
+        previous_start = start - timedelta(days=1)
+        self.yesterday = self.today if self.today.start == previous_start else Bucket(previous_start)
+        self.today = Bucket(start)
+        if week_start(now) != self.week.start:
+            self.week = Bucket(week_start(now))
+
+    def as_dict(self) -> dict:
+        """Return all buckets for storage."""
+        return {"today": self.today.as_dict(), "yesterday": self.yesterday.as_dict(), "week": self.week.as_dict()}
+
+    def restore(self, data: dict, now: datetime) -> None:
+        """Refill the buckets from storage and close the periods that ended while stopped."""
+        self.today = Bucket.from_dict(data["today"])
+        self.yesterday = Bucket.from_dict(data["yesterday"])
+        self.week = Bucket.from_dict(data["week"])
+        self.roll(now)
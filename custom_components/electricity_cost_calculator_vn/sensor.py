@@ -1,6 +1,8 @@
+from datetime import datetime
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
 import logging
@@ -9,23 +11,20 @@ _LOGGER = logging.getLogger(__name__)
 
 from .const import (
     DOMAIN,
-    CONF_KWH_SENSOR,
-    CONF_POWER_SENSOR,
-    CONF_CURRENT_SENSOR,
-    CONF_VOLTAGE_SENSOR,
-    CONF_DEVICE_NAME,
-    CONF_TIER_1_RATE,
-    CONF_TIER_2_RATE,
-    CONF_TIER_3_RATE,
-    CONF_TIER_4_RATE,
-    CONF_TIER_5_RATE,
-    CONF_TIER_6_RATE,
-    CONF_VAT_RATE,
-    CONF_COST_UNIT,
     SENSOR_COST,
     SENSOR_COST_WITH_VAT,
     SENSOR_KWH,
+    SENSOR_FORECAST,
+    SENSOR_KWH_TODAY,
+    SENSOR_KWH_YESTERDAY,
+    SENSOR_KWH_WEEK,
+    SENSOR_UPDATES,
+    SENSOR_UPDATE_TIME,
 )
+from .billing import next_cycle_start
+from .coordinator import ElectricityCostCoordinator, ElectricityCostData
+from .rollup import Bucket
+from .tariff import TieredTariff
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -33,320 +32,316 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the sensor platform."""
-    kwh_sensor = entry.data.get(CONF_KWH_SENSOR)
-    power_sensor = entry.data.get(CONF_POWER_SENSOR)
-    current_sensor = entry.data.get(CONF_CURRENT_SENSOR)
-    voltage_sensor = entry.data.get(CONF_VOLTAGE_SENSOR)
-    device_name = entry.data[CONF_DEVICE_NAME]
-
-    # Validate that the pricing tiers and VAT rate are present and valid
-    required_fields = [
-        CONF_TIER_1_RATE,
-        CONF_TIER_2_RATE,
-        CONF_TIER_3_RATE,
-        CONF_TIER_4_RATE,
-        CONF_TIER_5_RATE,
-        CONF_TIER_6_RATE,
-        CONF_VAT_RATE,
-        CONF_COST_UNIT,
-    ]
-    for field in required_fields:
-        if field not in entry.data:
-            _LOGGER.error("Missing required field in config entry: %s", field)
-            return
-
-    # Create sensors: kWh, cost without VAT, and cost with VAT
-    sensors = [
-        ElectricityKwhSensor(hass, entry, kwh_sensor, power_sensor, current_sensor, voltage_sensor, device_name),
-        ElectricityCostSensor(hass, entry, kwh_sensor, power_sensor, current_sensor, voltage_sensor, device_name, False),
-        ElectricityCostSensor(hass, entry, kwh_sensor, power_sensor, current_sensor, voltage_sensor, device_name, True),
-    ]
+    data: ElectricityCostData = hass.data[DOMAIN][entry.entry_id]
+
+    # Create sensors for every device and group: kWh, cost without VAT, and cost with VAT
+    sensors = []
+    for coordinator in data.coordinators:
+        sensors.extend(
+            [
+                ElectricityKwhSensor(coordinator),
+                ElectricityCostSensor(coordinator, False),
+                ElectricityCostSensor(coordinator, True),
+                ElectricityForecastSensor(coordinator),
+                ElectricityRollupSensor(coordinator, SENSOR_KWH_TODAY),
+                ElectricityRollupSensor(coordinator, SENSOR_KWH_YESTERDAY),
+                ElectricityRollupSensor(coordinator, SENSOR_KWH_WEEK),
+            ]
+        )
+        if coordinator.stats is not None:
+            sensors.extend(
+                [
+                    ElectricityUpdatesSensor(coordinator),
+                    ElectricityUpdateTimeSensor(coordinator),
+                ]
+            )
+    for group in data.groups:
+        sensors.extend(
+            [
+                ElectricityGroupKwhSensor(group),
+                ElectricityCostSensor(group, False),
+                ElectricityCostSensor(group, True),
+            ]
+        )
+    # Add all entities of the entry in one batch
     async_add_entities(sensors)
 
-class ElectricityKwhSensor(SensorEntity):
+class ElectricityCostEntity(SensorEntity):
+    """Base class for sensors fed by an ElectricityCostCoordinator."""
+
+    _attr_should_poll = False
+
+    def __init__(self, coordinator: ElectricityCostCoordinator):
+        """Initialize the entity."""
+        self.coordinator = coordinator
+        self.entry = coordinator.entry
+        self.device_name = coordinator.device_name
+
+    async def async_added_to_hass(self) -> None:
+        """Write a new state whenever the coordinator pushes an update."""
+        self.async_on_remove(
+            self.coordinator.async_add_listener(self.async_write_ha_state)
+        )
+
+    async def async_update(self) -> None:
+        """Update the sensor state."""
+        self.coordinator.async_refresh()
+
+    @property
+    def last_reset(self) -> datetime:
+        """Return the start of the current billing cycle."""
+        return self.coordinator.cycle_start
+
+class ElectricityKwhSensor(ElectricityCostEntity):
     """Representation of an electricity kWh sensor."""
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, kwh_sensor: str, power_sensor: str, current_sensor: str, voltage_sensor: str, device_name: str):
+    def __init__(self, coordinator: ElectricityCostCoordinator):
         """Initialize the kWh sensor."""
-        self.hass = hass
-        self.entry = entry
-        self.kwh_sensor = kwh_sensor
-        self.power_sensor = power_sensor
-        self.current_sensor = current_sensor
-        self.voltage_sensor = voltage_sensor
-        self.device_name = device_name
+        super().__init__(coordinator)
 
         _LOGGER.info("Creating kWh sensor for device: %s", self.device_name)
 
         # Sensor attributes
-        self._attr_name = f"{device_name} Electricity Usage"
-        self._attr_unique_id = f"{entry.entry_id}_{SENSOR_KWH}"
+        self._attr_name = f"{self.device_name} Electricity Usage"
+        self._attr_unique_id = f"{coordinator.key}_{SENSOR_KWH}"
         self._attr_unit_of_measurement = "kWh"
         self._attr_device_class = "energy"
         self._attr_state_class = "total"
 
-    def calculate_kwh(self) -> float:
-        """Calculate the kWh value from the configured sensors."""
-        kwh_value = 0.0
-
-        # If a kWh sensor is provided, use it (normalize units if necessary)
-        if self.kwh_sensor:
-            kwh_state = self.hass.states.get(self.kwh_sensor)
-            if kwh_state is None or kwh_state.state in ("unknown", "unavailable"):
-                _LOGGER.warning("kWh sensor %s is unavailable", self.kwh_sensor)
-                return 0.0
-            try:
-                value = float(kwh_state.state)
-                if value < 0:
-                    _LOGGER.warning("kWh sensor %s returned a negative value: %s", self.kwh_sensor, value)
-                    return 0.0
-                # Normalize units (e.g., Wh to kWh, MJ to kWh)
-                unit = kwh_state.attributes.get("unit_of_measurement", "").lower()
-                if unit == "kwh":
-                    kwh_value = value
-                elif unit == "wh":
-                    kwh_value = value / 1000  # Convert Wh to kWh
-                elif unit == "mj":
-                    kwh_value = value * 0.277778  # Convert MJ to kWh (1 MJ = 0.277778 kWh)
-                else:
-                    _LOGGER.warning("Unsupported unit for kWh sensor %s: %s", self.kwh_sensor, unit)
-                    return 0.0
-            except (ValueError, TypeError):
-                _LOGGER.warning("Invalid kWh value from sensor %s: %s", self.kwh_sensor, kwh_state.state)
-                return 0.0
-
-        # If a power sensor (W) is provided, convert to kWh
-        elif self.power_sensor:
-            power_state = self.hass.states.get(self.power_sensor)
-            if power_state is None or power_state.state in ("unknown", "unavailable"):
-                _LOGGER.warning("Power sensor %s is unavailable", self.power_sensor)
-                return 0.0
-            try:
-                value = float(power_state.state)
-                if value < 0:
-                    _LOGGER.warning("Power sensor %s returned a negative value: %s", self.power_sensor, value)
-                    return 0.0
-                # Normalize units (e.g., kW to W)
-                unit = power_state.attributes.get("unit_of_measurement", "").lower()
-                if unit == "w":
-                    power_value = value
-                elif unit == "kw":
-                    power_value = value * 1000  # Convert kW to W
-                else:
-                    _LOGGER.warning("Unsupported unit for power sensor %s: %s", self.power_sensor, unit)
-                    return 0.0
-                # Assume the power value is an average over 1 hour for simplicity
-                kwh_value = (power_value * 1) / 1000
-            except (ValueError, TypeError):
-                _LOGGER.warning("Invalid power value from sensor %s: %s", self.power_sensor, power_state.state)
-                return 0.0
-
-        # If current (A) and voltage (V) sensors are provided, calculate power and convert to kWh
-        elif self.current_sensor and self.voltage_sensor:
-            current_state = self.hass.states.get(self.current_sensor)
-            voltage_state = self.hass.states.get(self.voltage_sensor)
-            if current_state is None or current_state.state in ("unknown", "unavailable"):
-                _LOGGER.warning("Current sensor %s is unavailable", self.current_sensor)
-                return 0.0
-            if voltage_state is None or voltage_state.state in ("unknown", "unavailable"):
-                _LOGGER.warning("Voltage sensor %s is unavailable", self.voltage_sensor)
-                return 0.0
-            try:
-                current_value = float(current_state.state)
-                voltage_value = float(voltage_state.state)
-                if current_value < 0 or voltage_value < 0:
-                    _LOGGER.warning("Invalid current or voltage value: current=%s, voltage=%s", current_state.state, voltage_state.state)
-                    return 0.0
-                # Power (W) = Voltage (V) * Current (A)
-                power_value = voltage_value * current_value
-                # W to kWh: (W * hours) / 1000
-                kwh_value = (power_value * 1) / 1000
-            except (ValueError, TypeError):
-                _LOGGER.warning("Invalid current or voltage value: current=%s, voltage=%s", current_state.state, voltage_state.state)
-                return 0.0
-
-        else:
-            _LOGGER.warning("No valid sensor provided for device %s", self.device_name)
-            return 0.0
-
-        return kwh_value
-
     @property
     def state(self) -> StateType:
-        """Return the state of the sensor."""
-        kwh_value = self.calculate_kwh()
-        return round(kwh_value, 2)
+        """Return the consumption in the current billing cycle."""
+        return round(self.coordinator.kwh, 2)
 
-    async def async_update(self) -> None:
-        """Update the sensor state."""
-        self._attr_state = self.state
-
-class ElectricityCostSensor(SensorEntity):
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the meter readings the cycle consumption is based on."""
+        return {
+            "meter_reading": round(self.coordinator.meter_kwh, 2),
+            "cycle_baseline": round(self.coordinator.cycle_baseline or 0.0, 2),
+        }
+
+class ElectricityCostSensor(ElectricityCostEntity):
     """Representation of an electricity cost sensor."""
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, kwh_sensor: str, power_sensor: str, current_sensor: str, voltage_sensor: str, device_name: str, include_vat: bool):
+    def __init__(self, coordinator: ElectricityCostCoordinator, include_vat: bool):
         """Initialize the sensor."""
-        self.hass = hass
-        self.entry = entry
-        self.kwh_sensor = kwh_sensor
-        self.power_sensor = power_sensor
-        self.current_sensor = current_sensor
-        self.voltage_sensor = voltage_sensor
-        self.device_name = device_name
+        super().__init__(coordinator)
         self.include_vat = include_vat
 
-        # Get pricing tiers, VAT rate, and cost unit from config entry
-        try:
-            self.tier_1_rate = float(entry.data[CONF_TIER_1_RATE])
-            self.tier_2_rate = float(entry.data[CONF_TIER_2_RATE])
-            self.tier_3_rate = float(entry.data[CONF_TIER_3_RATE])
-            self.tier_4_rate = float(entry.data[CONF_TIER_4_RATE])
-            self.tier_5_rate = float(entry.data[CONF_TIER_5_RATE])
-            self.tier_6_rate = float(entry.data[CONF_TIER_6_RATE])
-            self.vat_rate = float(entry.data[CONF_VAT_RATE])
-        except (ValueError, TypeError) as e:
-            _LOGGER.error("Invalid pricing tier or VAT rate in config entry: %s", e)
-            raise ValueError("Invalid pricing tier or VAT rate in config entry") from e
-
-        self.cost_unit = entry.data[CONF_COST_UNIT]
-
         _LOGGER.info(
-            "Creating cost sensor for device: %s with cost unit: %s, pricing tiers: %s, %s, %s, %s, %s, %s, VAT rate: %s",
+            "Creating cost sensor for device: %s with cost unit: %s, tariff: %s",
             self.device_name,
-            self.cost_unit,
-            self.tier_1_rate,
-            self.tier_2_rate,
-            self.tier_3_rate,
-            self.tier_4_rate,
-            self.tier_5_rate,
-            self.tier_6_rate,
-            self.vat_rate,
+            coordinator.cost_unit,
+            coordinator.tariff,
         )
 
         # Sensor attributes
         self._attr_name = (
-            f"{device_name} Electricity Cost{' with VAT' if include_vat else ''}"
+            f"{self.device_name} Electricity Cost{' with VAT' if include_vat else ''}"
         )
         self._attr_unique_id = (
-            f"{entry.entry_id}_{SENSOR_COST_WITH_VAT if include_vat else SENSOR_COST}"
+            f"{coordinator.key}_{SENSOR_COST_WITH_VAT if include_vat else SENSOR_COST}"
         )
-        self._attr_unit_of_measurement = self.cost_unit
+        self._attr_unit_of_measurement = coordinator.cost_unit
         self._attr_device_class = "monetary"
         self._attr_state_class = "total"
 
-    def calculate_kwh(self) -> float:
-        """Calculate the kWh value from the configured sensors."""
-        kwh_value = 0.0
-
-        # If a kWh sensor is provided, use it (normalize units if necessary)
-        if self.kwh_sensor:
-            kwh_state = self.hass.states.get(self.kwh_sensor)
-            if kwh_state is None or kwh_state.state in ("unknown", "unavailable"):
-                _LOGGER.warning("kWh sensor %s is unavailable", self.kwh_sensor)
-                return 0.0
-            try:
-                value = float(kwh_state.state)
-                if value < 0:
-                    _LOGGER.warning("kWh sensor %s returned a negative value: %s", self.kwh_sensor, value)
-                    return 0.0
-                # Normalize units (e.g., Wh to kWh, MJ to kWh)
-                unit = kwh_state.attributes.get("unit_of_measurement", "").lower()
-                if unit == "kwh":
-                    kwh_value = value
-                elif unit == "wh":
-                    kwh_value = value / 1000  # Convert Wh to kWh
-                elif unit == "mj":
-                    kwh_value = value * 0.277778  # Convert MJ to kWh (1 MJ = 0.277778 kWh)
-                else:
-                    _LOGGER.warning("Unsupported unit for kWh sensor %s: %s", self.kwh_sensor, unit)
-                    return 0.0
-            except (ValueError, TypeError):
-                _LOGGER.warning("Invalid kWh value from sensor %s: %s", self.kwh_sensor, kwh_state.state)
-                return 0.0
-
-        # If a power sensor (W) is provided, convert to kWh
-        elif self.power_sensor:
-            power_state = self.hass.states.get(self.power_sensor)
-            if power_state is None or power_state.state in ("unknown", "unavailable"):
-                _LOGGER.warning("Power sensor %s is unavailable", self.power_sensor)
-                return 0.0
-            try:
-                value = float(power_state.state)
-                if value < 0:
-                    _LOGGER.warning("Power sensor %s returned a negative value: %s", self.power_sensor, value)
-                    return 0.0
-                # Normalize units (e.g., kW to W)
-                unit = power_state.attributes.get("unit_of_measurement", "").lower()
-                if unit == "w":
-                    power_value = value
-                elif unit == "kw":
-                    power_value = value * 1000  # Convert kW to W
-                else:
-                    _LOGGER.warning("Unsupported unit for power sensor %s: %s", self.power_sensor, unit)
-                    return 0.0
-                # Assume the power value is an average over 1 hour for simplicity
-                kwh_value = (power_value * 1) / 1000
-            except (ValueError, TypeError):
-                _LOGGER.warning("Invalid power value from sensor %s: %s", self.power_sensor, power_state.state)
-                return 0.0
-
-        # If current (A) and voltage (V) sensors are provided, calculate power and convert to kWh
-        elif self.current_sensor and self.voltage_sensor:
-            current_state = self.hass.states.get(self.current_sensor)
-            voltage_state = self.hass.states.get(self.voltage_sensor)
-            if current_state is None or current_state.state in ("unknown", "unavailable"):
-                _LOGGER.warning("Current sensor %s is unavailable", self.current_sensor)
-                return 0.0
-            if voltage_state is None or voltage_state.state in ("unknown", "unavailable"):
-                _LOGGER.warning("Voltage sensor %s is unavailable", self.voltage_sensor)
-                return 0.0
-            try:
-                current_value = float(current_state.state)
-                voltage_value = float(voltage_state.state)
-                if current_value < 0 or voltage_value < 0:
-                    _LOGGER.warning("Invalid current or voltage value: current=%s, voltage=%s", current_state.state, voltage_state.state)
-                    return 0.0
-                # Power (W) = Voltage (V) * Current (A)
-                power_value = voltage_value * current_value
-                # W to kWh: (W * hours) / 1000
-                kwh_value = (power_value * 1) / 1000
-            except (ValueError, TypeError):
-                _LOGGER.warning("Invalid current or voltage value: current=%s, voltage=%s", current_state.state, voltage_state.state)
-                return 0.0
-
-        else:
-            _LOGGER.warning("No valid sensor provided for device %s", self.device_name)
-            return 0.0
-
-        return kwh_value
+    @property
+    def extra_state_attributes(self) -> dict | None:
+        """Return this device's share of the cost of the groups it belongs to."""
+        groups = getattr(self.coordinator, "groups", None)
+        if not groups:
+            return None
+        vat_factor = 1 + self.coordinator.tariff.vat_rate if self.include_vat else 1
+        return {
+            f"{group.device_name} share": round(group.share(self.coordinator.key) * vat_factor)
+            for group in groups
+        }
 
     @property
     def state(self) -> StateType:
         """Return the state of the sensor."""
-        kwh_value = self.calculate_kwh()
-
-        # Calculate the cost using the tiered pricing structure
-        cost = 0
-        if kwh_value > 0:
-            if kwh_value <= 50:
-                cost = kwh_value * self.tier_1_rate
-            elif kwh_value <= 100:
-                cost = (50 * self.tier_1_rate) + ((kwh_value - 50) * self.tier_2_rate)
-            elif kwh_value <= 200:
-                cost = (50 * self.tier_1_rate) + (50 * self.tier_2_rate) + ((kwh_value - 100) * self.tier_3_rate)
-            elif kwh_value <= 300:
-                cost = (50 * self.tier_1_rate) + (50 * self.tier_2_rate) + (100 * self.tier_3_rate) + ((kwh_value - 200) * self.tier_4_rate)
-            elif kwh_value <= 400:
-                cost = (50 * self.tier_1_rate) + (50 * self.tier_2_rate) + (100 * self.tier_3_rate) + (100 * self.tier_4_rate) + ((kwh_value - 300) * self.tier_5_rate)
-            else:
-                cost = (50 * self.tier_1_rate) + (50 * self.tier_2_rate) + (100 * self.tier_3_rate) + (100 * self.tier_4_rate) + (100 * self.tier_5_rate) + ((kwh_value - 400) * self.tier_6_rate)
-
-        # Add VAT if applicable
         if self.include_vat:
-            cost = cost * (1 + self.vat_rate)
+            return round(self.coordinator.cost_with_vat)
+        return round(self.coordinator.cost)
 
-        return round(cost)
+class ElectricityForecastSensor(ElectricityCostEntity):
+    """Representation of the projected cost at the end of the billing cycle."""
 
-    async def async_update(self) -> None:
-        """Update the sensor state."""
-        self._attr_state = self.state
\ No newline at end of file
+    def __init__(self, coordinator: ElectricityCostCoordinator):
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_name = f"{self.device_name} Electricity Projected Cost"
+        self._attr_unique_id = f"{coordinator.key}_{SENSOR_FORECAST}"
+        self._attr_unit_of_measurement = coordinator.cost_unit
+        self._attr_device_class = "monetary"
+        self._projection: tuple[float, float, float] | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Project the cycle once per coordinator update, before the state is written."""
+        self._projection = self.coordinator.projected_cycle()
+        self.async_on_remove(
+            self.coordinator.async_add_listener(self._async_update_projection)
+        )
+
+    @callback
+    def _async_update_projection(self) -> None:
+        """Project the cycle from the new values and write the state."""
+        self._projection = self.coordinator.projected_cycle()
+        self.async_write_ha_state()
+
+    @property
+    def state(self) -> StateType:
+        """Return the projected cost without VAT, or None until there is enough history."""
+        projection = self._projection
+        if projection is None:
+            return None
+        return round(projection[1])
+
+    @property
+    def extra_state_attributes(self) -> dict | None:
+        """Return the projected consumption, cost with VAT and tier."""
+        projection = self._projection
+        if projection is None:
+            return None
+        projected_kwh, _, projected_cost_with_vat = projection
+        attributes = {
+            "projected_kwh": round(projected_kwh, 2),
+            "projected_cost_with_vat": round(projected_cost_with_vat),
+            "kwh_per_day": round(self.coordinator.forecast.rate() * 86400, 2),
+            "cycle_end": next_cycle_start(self.coordinator.cycle_start, self.coordinator.billing_day).isoformat(),
+        }
+        tariff = self.coordinator.tariff
+        if isinstance(tariff, TieredTariff):
+            attributes["projected_tier"] = tariff.tier_index(projected_kwh) + 1
+        return attributes
+
+    @property
+    def last_reset(self) -> None:
+        """A projection has no reset."""
+        return None
+
+class ElectricityRollupSensor(ElectricityCostEntity):
+    """Representation of the consumption of a device today, yesterday or this week, with its cost."""
+
+    # Sensor type -> name suffix
+    PERIODS = {
+        SENSOR_KWH_TODAY: "Today",
+        SENSOR_KWH_YESTERDAY: "Yesterday",
+        SENSOR_KWH_WEEK: "This Week",
+    }
+
+    def __init__(self, coordinator: ElectricityCostCoordinator, sensor_type: str):
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self.sensor_type = sensor_type
+        self._attr_name = f"{self.device_name} Electricity Usage {self.PERIODS[sensor_type]}"
+        self._attr_unique_id = f"{coordinator.key}_{sensor_type}"
+        self._attr_unit_of_measurement = "kWh"
+        self._attr_device_class = "energy"
+        if sensor_type != SENSOR_KWH_YESTERDAY:
+            # Yesterday repeats a finished day, so it is kept out of the long-term statistics
+            self._attr_state_class = "total"
+
+    @property
+    def bucket(self) -> Bucket:
+        """Return the bucket of this sensor's period."""
+        rollups = self.coordinator.rollups
+        if self.sensor_type == SENSOR_KWH_TODAY:
+            return rollups.today
+        if self.sensor_type == SENSOR_KWH_YESTERDAY:
+            return rollups.yesterday
+        return rollups.week
+
+    @property
+    def state(self) -> StateType:
+        """Return the consumption in the period."""
+        return round(self.bucket.kwh, 2)
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the cost of the consumption in the period."""
+        bucket = self.bucket
+        return {
+            "cost": round(bucket.cost),
+            "cost_with_vat": round(bucket.cost_with_vat),
+            "cost_unit": self.coordinator.cost_unit,
+        }
+
+    @property
+    def last_reset(self) -> datetime | None:
+        """Return the start of the period; yesterday has no state class, so no reset."""
+        if self.sensor_type == SENSOR_KWH_YESTERDAY:
+            return None
+        return self.bucket.start
+
+class ElectricityGroupKwhSensor(ElectricityKwhSensor):
+    """Representation of the total kWh of a group of devices."""
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the devices the total is made of."""
+        return {"members": [member.device_name for member in self.coordinator.members]}
+
+class ElectricityUpdatesSensor(ElectricityCostEntity):
+    """Diagnostic sensor counting the updates of a device."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator: ElectricityCostCoordinator):
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_name = f"{self.device_name} Electricity Updates"
+        self._attr_unique_id = f"{coordinator.key}_{SENSOR_UPDATES}"
+        self._attr_state_class = "total_increasing"
+
+    @property
+    def state(self) -> StateType:
+        """Return the number of updates since startup."""
+        return self.coordinator.stats.counters.get("updates", 0)
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return all counters of the device."""
+        return dict(self.coordinator.stats.counters)
+
+    @property
+    def last_reset(self) -> None:
+        """The counter is never reset while running."""
+        return None
+
+class ElectricityUpdateTimeSensor(ElectricityCostEntity):
+    """Diagnostic sensor with the mean time spent per update of a device."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator: ElectricityCostCoordinator):
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_name = f"{self.device_name} Electricity Update Time"
+        self._attr_unique_id = f"{coordinator.key}_{SENSOR_UPDATE_TIME}"
+        self._attr_unit_of_measurement = "ms"
+        self._attr_state_class = "measurement"
+
+    @property
+    def state(self) -> StateType:
+        """Return the mean time to read the sources and calculate the cost."""
+        timings = self.coordinator.stats.timings
+        return round(sum(timing.mean for timing in timings.values()), 3)
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the mean and maximum time of each step."""
+        attributes = {}
+        for name, timing in self.coordinator.stats.timings.items():
+            attributes[f"{name}_mean_ms"] = round(timing.mean, 3)
+            attributes[f"{name}_max_ms"] = round(timing.maximum, 3)
+        return attributes
+
+    @property
+    def last_reset(self) -> None:
+        """A measurement has no reset."""
+        return None
@@ -0,0 +1,137 @@
+from datetime import datetime
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_utc_time_change
+from homeassistant.util import dt as dt_util
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+from .const import (
+    DOMAIN,
+    STATISTIC_COST,
+    STATISTIC_ENERGY,
+)
+
+class HourlyStatisticsWriter:
+    """Aggregate kWh and cost deltas per hour and import them as external statistics.
+
+    Deltas are summed in memory and written once per hour, so the recorder gets
+    one compact row per statistic and hour instead of a state row per update.
+    The sums of the open hour are saved with the device checkpoint, so a
+    restart or reload within the hour continues them.
+    The recorder is only an optional dependency, so its helpers are imported
+    when they are first used rather than with this module.
+    """
+
+    def __init__(self, hass: HomeAssistant, key: str, device_name: str, cost_unit: str):
+        """Initialize the writer."""
+        self.hass = hass
+        self.device_name = device_name
+        self.cost_unit = cost_unit
+        self.energy_statistic_id = f"{DOMAIN}:{key.lower()}_{STATISTIC_ENERGY}"
+        self.cost_statistic_id = f"{DOMAIN}:{key.lower()}_{STATISTIC_COST}"
+
+        self._hour_start = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+        self._hour_kwh = 0.0
+        self._hour_cost = 0.0
+        self._sums = {self.energy_statistic_id: 0.0, self.cost_statistic_id: 0.0}
+        self._last_starts: dict[str, datetime | None] = {self.energy_statistic_id: None, self.cost_statistic_id: None}
+        self._pending: dict[str, list[dict]] = {self.energy_statistic_id: [], self.cost_statistic_id: []}
+        self._unsub_hourly: CALLBACK_TYPE | None = None
+
+    async def async_start(self) -> None:
+        """Continue the sums of previously imported statistics and start the hourly timer."""
+        from homeassistant.components.recorder import get_instance
+        from homeassistant.components.recorder.statistics import get_last_statistics
+
+        for statistic_id in self._sums:
+            last = await get_instance(self.hass).async_add_executor_job(
+                get_last_statistics, self.hass, 1, statistic_id, True, {"sum"}
+            )
+            if last.get(statistic_id):
+                row = last[statistic_id][0]
+                self._sums[statistic_id] = row.get("sum") or 0.0
+                start = row["start"]
+                self._last_starts[statistic_id] = (
+                    dt_util.utc_from_timestamp(start) if isinstance(start, (int, float)) else start
+                )
+        self._unsub_hourly = async_track_utc_time_change(
+            self.hass, self._async_hour_elapsed, minute=0, second=0
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop the hourly timer."""
+        if self._unsub_hourly is not None:
+            self._unsub_hourly()
+            self._unsub_hourly = None
+
+    def as_dict(self) -> dict:
+        """Return the open hour and its sums for storage."""
+        return {"hour_start": self._hour_start.isoformat(), "kwh": self._hour_kwh, "cost": self._hour_cost}
+
+    def restore(self, data: dict) -> None:
+        """Continue the sums of the open hour if it is still the current one."""
+        if dt_util.parse_datetime(data["hour_start"]) == self._hour_start:
+            self._hour_kwh = data["kwh"]
+            self._hour_cost = data["cost"]
+
+    @callback
+    def async_add(self, kwh_delta: float, cost_delta: float) -> None:
+        """Add a consumption and cost delta to the current hour."""
+        self._hour_kwh += kwh_delta
+        self._hour_cost += cost_delta
+
+    @callback
+    def _async_hour_elapsed(self, now: datetime) -> None:
+        """Close the elapsed hour and import all pending rows."""
+        from homeassistant.components.recorder.models import StatisticData
+
+        hour_start = now.replace(minute=0, second=0, microsecond=0)
+        if hour_start <= self._hour_start:
+            return
+        for statistic_id, delta in (
+            (self.energy_statistic_id, self._hour_kwh),
+            (self.cost_statistic_id, self._hour_cost),
+        ):
+            last_start = self._last_starts[statistic_id]
+            if last_start is not None and last_start >= self._hour_start:
+                # This hour was already imported before a restart
+                continue
+            self._sums[statistic_id] += delta
+            self._pending[statistic_id].append(
+                StatisticData(start=self._hour_start, state=self._sums[statistic_id], sum=self._sums[statistic_id])
+            )
+        self._hour_start = hour_start
+        self._hour_kwh = 0.0
+        self._hour_cost = 0.0
+        self._async_flush()
+
+    @callback
+    def _async_flush(self) -> None:
+        """Import the pending rows of each statistic in one batch."""
+        from homeassistant.components.recorder.models import StatisticMetaData
+        from homeassistant.components.recorder.statistics import async_add_external_statistics
+
+        for statistic_id, name, unit in (
+            (self.energy_statistic_id, f"{self.device_name} Electricity Usage", "kWh"),
+            (self.cost_statistic_id, f"{self.device_name} Electricity Cost", self.cost_unit),
+        ):
+            rows = self._pending[statistic_id]
+            if not rows:
+                continue
+            metadata = StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=name,
+                source=DOMAIN,
+                statistic_id=statistic_id,
+                unit_of_measurement=unit,
+            )
+            try:
+                async_add_external_statistics(self.hass, metadata, rows)
+            except Exception as e:  # Keep the rows and retry at the next hour
+                _LOGGER.warning("Could not import statistics %s: %s", statistic_id, e)
+                continue
+            self._last_starts[statistic_id] = rows[-1]["start"]
+            self._pending[statistic_id] = []
@@ -0,0 +1,421 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+import re
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, batch pricing falls back to pure Python
+    np = None
+
+from .const import (
+    CONF_TIER_1_RATE,
+    CONF_TIER_2_RATE,
+    CONF_TIER_3_RATE,
+    CONF_TIER_4_RATE,
+    CONF_TIER_5_RATE,
+    CONF_TIER_6_RATE,
+    CONF_TIER_BOUNDARIES,
+    CONF_TIER_RATES,
+    CONF_VAT_RATE,
+    CONF_TARIFF_MODE,
+    CONF_PEAK_RATE,
+    CONF_NORMAL_RATE,
+    CONF_OFF_PEAK_RATE,
+    CONF_TOU_SCHEDULE,
+    CONF_HOLIDAYS,
+    CONF_TARIFF_HISTORY,
+    CONF_EFFECTIVE_FROM,
+    TARIFF_MODE_TIERED,
+    TARIFF_MODE_TIME_OF_USE,
+    PERIOD_OFF_PEAK,
+    PERIOD_NORMAL,
+    PERIOD_PEAK,
+    DAY_HOLIDAY,
+    DEFAULT_TIER_BOUNDARIES,
+    DEFAULT_TARIFF_MODE,
+    DEFAULT_TOU_SCHEDULE,
+)
+
+LEGACY_TIER_RATE_KEYS = [
+    CONF_TIER_1_RATE,
+    CONF_TIER_2_RATE,
+    CONF_TIER_3_RATE,
+    CONF_TIER_4_RATE,
+    CONF_TIER_5_RATE,
+    CONF_TIER_6_RATE,
+]
+
+# Config keys that make up a tariff version
+TARIFF_CONFIG_KEYS = [
+    *LEGACY_TIER_RATE_KEYS,
+    CONF_TIER_BOUNDARIES,
+    CONF_TIER_RATES,
+    CONF_VAT_RATE,
+    CONF_TARIFF_MODE,
+    CONF_PEAK_RATE,
+    CONF_NORMAL_RATE,
+    CONF_OFF_PEAK_RATE,
+    CONF_TOU_SCHEDULE,
+    CONF_HOLIDAYS,
+]
+
+def parse_number_list(value) -> list[float]:
+    """Parse a list of numbers given as a list or a comma/semicolon separated string."""
+    if isinstance(value, str):
+        value = [part for part in re.split(r"[,;]", value) if part.strip()]
+    return [float(item) for item in value]
+
+class TieredTariff:
+    """Progressive tariff with the cost of every full tier precomputed.
+
+    boundaries are the upper kWh bounds of all tiers but the last, so there is
+    one more rate than boundaries. Looking up a cost is one bisect plus one
+    multiply-add.
+    """
+
+    __slots__ = ("boundaries", "rates", "vat_rate", "_lower_bounds", "_cumulative", "_arrays")
+
+    def __init__(self, boundaries: list[float], rates: list[float], vat_rate: float):
+        """Initialize the tariff and precompute the cumulative cost at each boundary."""
+        boundaries = [float(boundary) for boundary in boundaries]
+        rates = [float(rate) for rate in rates]
+        vat_rate = float(vat_rate)
+        if len(rates) != len(boundaries) + 1:
+            raise ValueError(f"Expected {len(boundaries) + 1} tier rates for {len(boundaries)} boundaries, got {len(rates)}")
+        if any(rate < 0 for rate in rates) or vat_rate < 0:
+            raise ValueError("Tier rates and VAT rate must be non-negative")
+        if any(lower >= upper for lower, upper in zip([0.0] + boundaries, boundaries)):
+            raise ValueError("Tier boundaries must be positive and strictly increasing")
+
+        self.boundaries = boundaries
+        self.rates = rates
+        self.vat_rate = vat_rate
+        self._lower_bounds = [0.0] + boundaries
+
+        # Cost of all full tiers below each tier, summed in tier order
+        self._cumulative = [0.0]
+        for lower, upper, rate in zip(self._lower_bounds, boundaries, rates):
+            self._cumulative.append(self._cumulative[-1] + (upper - lower) * rate)
+
+        # Same tables as arrays for vectorized batch pricing
+        self._arrays = None
+        if np is not None:
+            self._arrays = (
+                np.array(boundaries, dtype=float),
+                np.array(self._lower_bounds, dtype=float),
+                np.array(self._cumulative, dtype=float),
+                np.array(rates, dtype=float),
+            )
+
+    @classmethod
+    def from_config(cls, data) -> "TieredTariff":
+        """Build the tariff from config entry data."""
+        boundaries = parse_number_list(data.get(CONF_TIER_BOUNDARIES) or DEFAULT_TIER_BOUNDARIES)
+        if data.get(CONF_TIER_RATES):
+            rates = parse_number_list(data[CONF_TIER_RATES])
+        else:
+            rates = [data[key] for key in LEGACY_TIER_RATE_KEYS]
+        return cls(boundaries, rates, data[CONF_VAT_RATE])
+
+    def tier_index(self, kwh_value: float) -> int:
+        """Return the zero-based tier that kwh_value falls into."""
+        return bisect_left(self.boundaries, kwh_value)
+
+    def cost(self, kwh_value: float) -> float:
+        """Return the cost of kwh_value without VAT."""
+        if kwh_value <= 0:
+            return 0.0
+        tier = bisect_left(self.boundaries, kwh_value)
+        return self._cumulative[tier] + (kwh_value - self._lower_bounds[tier]) * self.rates[tier]
+
+    def cost_with_vat(self, kwh_value: float) -> float:
+        """Return the cost of kwh_value including VAT."""
+        return self.cost(kwh_value) * (1 + self.vat_rate)
+
+    def cost_batch(self, kwh_values):
+        """Return the costs without and with VAT of many kWh values at once.
+
+        Uses one vectorized NumPy pass when NumPy is installed and returns two
+        arrays, otherwise returns two lists. Results are identical to cost()
+        and cost_with_vat() for every value.
+        """
+        vat_factor = 1 + self.vat_rate
+        if self._arrays is None:
+            costs = [self.cost(kwh_value) for kwh_value in kwh_values]
+            return costs, [cost * vat_factor for cost in costs]
+
+        boundaries, lower_bounds, cumulative, rates = self._arrays
+        kwh = np.asarray(kwh_values, dtype=float)
+        tiers = np.searchsorted(boundaries, kwh, side="left")
+        costs = cumulative[tiers] + (kwh - lower_bounds[tiers]) * rates[tiers]
+        costs = np.where(kwh > 0, costs, 0.0)
+        return costs, costs * vat_factor
+
+    def __repr__(self) -> str:
+        """Return a readable description of the tariff."""
+        return f"TieredTariff(boundaries={self.boundaries}, rates={self.rates}, vat_rate={self.vat_rate})"
+
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+PERIODS = [PERIOD_OFF_PEAK, PERIOD_NORMAL, PERIOD_PEAK]
+HOLIDAY_ROW = len(WEEKDAYS)
+
+def _parse_slot(value: str) -> int:
+    """Convert "HH:MM" on the 15 minute grid to a slot index of the day."""
+    hours, minutes = (int(part) for part in value.strip().split(":"))
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or minutes % SLOT_MINUTES or hours * 60 + minutes > 24 * 60:
+        raise ValueError(f"Time {value} must be between 00:00 and 24:00 on a {SLOT_MINUTES} minute grid")
+    return (hours * 60 + minutes) // SLOT_MINUTES
+
+class TimeOfUseTariff:
+    """Peak / normal / off-peak tariff with the weekly schedule precomputed.
+
+    The schedule is stored as one row of 96 quarter-hour slots per weekday plus
+    a row for holidays, so finding the period of a moment is a single index.
+    Each slot also stores where its run of equal periods ends, so pricing an
+    energy delta visits each period boundary it spans instead of each slot.
+    """
+
+    __slots__ = ("rates", "vat_rate", "holidays", "yearly_holidays", "_periods", "_run_ends")
+
+    def __init__(self, rates: dict[str, float], schedule: dict, holidays: list[str], vat_rate: float):
+        """Initialize the tariff and precompute the slot table."""
+        self.rates = [float(rates[period]) for period in PERIODS]
+        self.vat_rate = float(vat_rate)
+        if any(rate < 0 for rate in self.rates) or self.vat_rate < 0:
+            raise ValueError("Time-of-use rates and VAT rate must be non-negative")
+
+        # Exact dates and yearly (month, day) holidays
+        self.holidays: set[date] = set()
+        self.yearly_holidays: set[tuple[int, int]] = set()
+        for holiday in holidays:
+            parts = [int(part) for part in str(holiday).split("-")]
+            if len(parts) == 3:
+                self.holidays.add(date(*parts))
+            elif len(parts) == 2:
+                date(2000, *parts)  # Validate the month and day
+                self.yearly_holidays.add((parts[0], parts[1]))
+            else:
+                raise ValueError(f"Holiday {holiday} must be YYYY-MM-DD or MM-DD")
+
+        normal = PERIODS.index(PERIOD_NORMAL)
+        self._periods = [bytearray([normal]) * SLOTS_PER_DAY for _ in range(HOLIDAY_ROW + 1)]
+        for period, rules in schedule.items():
+            if period not in PERIODS:
+                raise ValueError(f"Unknown time-of-use period: {period}")
+            for rule in rules:
+                rows = []
+                for day in rule["days"]:
+                    if day == DAY_HOLIDAY:
+                        rows.append(HOLIDAY_ROW)
+                    elif day in WEEKDAYS:
+                        rows.append(WEEKDAYS.index(day))
+                    else:
+                        raise ValueError(f"Unknown day in time-of-use schedule: {day}")
+                for window in rule["windows"]:
+                    start, end = (_parse_slot(part) for part in window.split("-"))
+                    # Windows past midnight (e.g. 22:00-04:00) wrap to the start of the same day row
+                    slots = range(start, end) if start < end else [*range(start, SLOTS_PER_DAY), *range(0, end)]
+                    for row in rows:
+                        for slot in slots:
+                            self._periods[row][slot] = PERIODS.index(period)
+
+        self._run_ends = []
+        for periods in self._periods:
+            run_ends = [SLOTS_PER_DAY] * SLOTS_PER_DAY
+            for slot in range(SLOTS_PER_DAY - 2, -1, -1):
+                run_ends[slot] = run_ends[slot + 1] if periods[slot] == periods[slot + 1] else slot + 1
+            self._run_ends.append(run_ends)
+
+    @classmethod
+    def from_config(cls, data) -> "TimeOfUseTariff":
+        """Build the tariff from config entry data."""
+        rates = {
+            PERIOD_PEAK: data[CONF_PEAK_RATE],
+            PERIOD_NORMAL: data[CONF_NORMAL_RATE],
+            PERIOD_OFF_PEAK: data[CONF_OFF_PEAK_RATE],
+        }
+        return cls(
+            rates,
+            data.get(CONF_TOU_SCHEDULE) or DEFAULT_TOU_SCHEDULE,
+            data.get(CONF_HOLIDAYS) or [],
+            data[CONF_VAT_RATE],
+        )
+
+    def _row(self, day: date) -> int:
+        """Return the schedule row used on a date."""
+        if day in self.holidays or (day.month, day.day) in self.yearly_holidays:
+            return HOLIDAY_ROW
+        return day.weekday()
+
+    def period_at(self, moment: datetime) -> str:
+        """Return the period in effect at a local time."""
+        slot = (moment.hour * 60 + moment.minute) // SLOT_MINUTES
+        return PERIODS[self._periods[self._row(moment.date())][slot]]
+
+    def cost_between(self, kwh_value: float, start: datetime, end: datetime) -> float:
+        """Return the cost without VAT of energy used evenly between two local times.
+
+        Energy spanning a period boundary is split in proportion to the time
+        spent in each period.
+        """
+        if kwh_value == 0:
+            return 0.0
+        total_seconds = (end - start).total_seconds()
+        if total_seconds <= 0:
+            row = self._row(end.date())
+            return kwh_value * self.rates[self._periods[row][(end.hour * 60 + end.minute) // SLOT_MINUTES]]
+
+        cost = 0.0
+        moment = start
+        while moment < end:
+            row = self._row(moment.date())
+            slot = (moment.hour * 60 + moment.minute) // SLOT_MINUTES
+            midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+            segment_end = min(midnight + timedelta(minutes=self._run_ends[row][slot] * SLOT_MINUTES), end)
+            fraction = (segment_end - moment).total_seconds() / total_seconds
+            cost += kwh_value * fraction * self.rates[self._periods[row][slot]]
+            moment = segment_end
+        return cost
+
+    def __repr__(self) -> str:
+        """Return a readable description of the tariff."""
+        return f"TimeOfUseTariff(rates={dict(zip(PERIODS, self.rates))}, vat_rate={self.vat_rate})"
+
+def build_tariff(data) -> TieredTariff | TimeOfUseTariff:
+    """Build the tariff selected by the tariff mode of config entry data."""
+    mode = data.get(CONF_TARIFF_MODE) or DEFAULT_TARIFF_MODE
+    if mode == TARIFF_MODE_TIME_OF_USE:
+        return TimeOfUseTariff.from_config(data)
+    if mode != TARIFF_MODE_TIERED:
+        raise ValueError(f"Unknown tariff mode: {mode}")
+    return TieredTariff.from_config(data)
+
+def tariff_config(data) -> dict:
+    """Return the tariff settings of config entry data."""
+    return {key: data[key] for key in TARIFF_CONFIG_KEYS if key in data}
+
+def append_tariff_version(previous_data, new_data, effective_from: datetime) -> list[dict]:
+    """Return the tariff history of previous_data extended by the tariff of new_data.
+
+    The first version recorded has no effective time and covers everything
+    before the first change. A new version is only added if the tariff changed.
+    """
+    history = list(previous_data.get(CONF_TARIFF_HISTORY) or [])
+    if not history:
+        history.append({CONF_EFFECTIVE_FROM: None, **tariff_config(previous_data)})
+    latest = {key: value for key, value in history[-1].items() if key != CONF_EFFECTIVE_FROM}
+    new_tariff = tariff_config(new_data)
+    if new_tariff != latest:
+        history.append({CONF_EFFECTIVE_FROM: effective_from.isoformat(), **new_tariff})
+    return history
+
+class TariffHistory:
+    """Tariff versions sorted by the time they became effective."""
+
+    __slots__ = ("_starts", "_tariffs")
+
+    def __init__(self, versions: list[tuple[float, TieredTariff | TimeOfUseTariff]]):
+        """Initialize the history from (effective Unix timestamp, tariff) pairs."""
+        versions = sorted(versions, key=lambda version: version[0])
+        self._starts = [start for start, _ in versions]
+        self._tariffs = [tariff for _, tariff in versions]
+
+    @classmethod
+    def from_config(cls, data) -> "TariffHistory":
+        """Build the history from config entry data, or a single version if it has none."""
+        history = data.get(CONF_TARIFF_HISTORY)
+        if not history:
+            return cls([(float("-inf"), build_tariff(data))])
+        versions = []
+        for version in history:
+            effective_from = version.get(CONF_EFFECTIVE_FROM)
+            start = datetime.fromisoformat(effective_from).timestamp() if effective_from else float("-inf")
+            versions.append((start, build_tariff({**data, **version})))
+        return cls(versions)
+
+    def tariff_at(self, timestamp: float) -> TieredTariff | TimeOfUseTariff:
+        """Return the tariff in effect at a Unix timestamp."""
+        return self._tariffs[max(bisect_right(self._starts, timestamp) - 1, 0)]
+
+    def next_change_after(self, timestamp: float) -> float:
+        """Return when the tariff in effect at timestamp is replaced, or infinity."""
+        index = bisect_right(self._starts, timestamp)
+        return self._starts[index] if index < len(self._starts) else float("inf")
+
+    def cost_series(self, readings) -> tuple[list[float], list[float]]:
+        """Price (local datetime, cumulative cycle kWh) readings of one billing cycle in one pass.
+
+        Returns the cumulative costs without and with VAT after each reading,
+        each segment priced with the tariff in effect at that time.
+        """
+        costs = []
+        costs_with_vat = []
+        cycle_cost = None
+        for moment, kwh_value in readings:
+            if cycle_cost is None:
+                cycle_cost = CycleCost(self, moment)
+            cycle_cost.update(kwh_value, moment)
+            costs.append(cycle_cost.cost)
+            costs_with_vat.append(cycle_cost.cost_with_vat)
+        return costs, costs_with_vat
+
+class CycleCost:
+    """Running cost of the consumption of one billing cycle under a tariff history.
+
+    When a new tariff version takes effect, the cost so far is kept as an
+    anchor and only consumption after the change is priced with the new
+    tariff, so past consumption is never repriced. The history is only
+    searched again once the current version expires.
+    """
+
+    __slots__ = (
+        "history",
+        "tariff",
+        "kwh",
+        "cost",
+        "cost_with_vat",
+        "_valid_until",
+        "_anchor_kwh",
+        "_anchor_cost",
+        "_anchor_cost_with_vat",
+        "_last_moment",
+    )
+
+    def __init__(self, history: TariffHistory, moment: datetime):
+        """Initialize an empty cycle starting at moment."""
+        self.history = history
+        self.start(moment)
+
+    def start(self, moment: datetime, kwh_value: float = 0.0, cost: float = 0.0, cost_with_vat: float = 0.0) -> None:
+        """Continue pricing from moment with the given cycle totals."""
+        timestamp = moment.timestamp()
+        self.tariff = self.history.tariff_at(timestamp)
+        self._valid_until = self.history.next_change_after(timestamp)
+        self.kwh = kwh_value
+        self.cost = cost
+        self.cost_with_vat = cost_with_vat
+        self._anchor_kwh = kwh_value
+        self._anchor_cost = cost
+        self._anchor_cost_with_vat = cost_with_vat
+        self._last_moment = moment
+
+    def update(self, kwh_value: float, moment: datetime) -> None:
+        """Price the cycle consumption kwh_value reached at moment."""
+        if moment.timestamp() >= self._valid_until:
+            self.start(moment, self.kwh, self.cost, self.cost_with_vat)
+        tariff = self.tariff
+        vat_factor = 1 + tariff.vat_rate
+        if isinstance(tariff, TimeOfUseTariff):
+            # Time-of-use cost depends on when energy is used, so each delta is priced and added
+            delta_cost = tariff.cost_between(kwh_value - self.kwh, self._last_moment, moment)
+            self.cost += delta_cost
+            self.cost_with_vat += delta_cost * vat_factor
+        else:
+            priced = tariff.cost(kwh_value) - tariff.cost(self._anchor_kwh)
+            self.cost = self._anchor_cost + priced
+            self.cost_with_vat = self._anchor_cost_with_vat + priced * vat_factor
+        self.kwh = kwh_value
+        self._last_moment = moment
@@ -0,0 +1,92 @@
+from bisect import bisect_left
+from math import inf
+
+from .const import (
+    EVENT_TIER_CHANGED,
+    EVENT_BUDGET_EXCEEDED,
+    TIER_HYSTERESIS,
+    BUDGET_HYSTERESIS,
+)
+from .tariff import TieredTariff, TimeOfUseTariff
+
+class ThresholdTracker:
+    """Track which of a sorted list of thresholds a growing value has crossed.
+
+    The next boundary up and down is kept precomputed, so an update that stays
+    between them costs two comparisons. A threshold is crossed once the value
+    exceeds it, like a tier that starts above its boundary; it is only crossed
+    back once the value drops hysteresis below it, so a value flapping around
+    a threshold reports one crossing instead of one per update.
+    """
+
+    __slots__ = ("thresholds", "hysteresis", "level", "_up", "_down")
+
+    def __init__(self, thresholds: list[float], hysteresis: float):
+        """Initialize the tracker; the level is unknown until the first update."""
+        self.thresholds = sorted(float(threshold) for threshold in thresholds)
+        self.hysteresis = float(hysteresis)
+        self.level: int | None = None
+        self._up = -inf
+        self._down = inf
+
+    def reset(self, value: float) -> None:
+        """Set the level from value without reporting a crossing."""
+        self._set_level(bisect_left(self.thresholds, value))
+
+    def update(self, value: float) -> int | None:
+        """Apply a new value and return the previous level if it crossed a threshold, otherwise None."""
+        if self._down < value <= self._up:
+            return None
+        previous = self.level
+        if previous is None:
+            self.reset(value)
+            return None
+        if value > self._up:
+            level = bisect_left(self.thresholds, value)
+        else:
+            # Only drop below the thresholds the value is at least hysteresis under
+            level = bisect_left(self.thresholds, value + self.hysteresis)
+        self._set_level(level)
+        return previous
+
+    def _set_level(self, level: int) -> None:
+        """Precompute the values that leave the given level."""
+        self.level = level
+        self._up = self.thresholds[level] if level < len(self.thresholds) else inf
+        self._down = self.thresholds[level - 1] - self.hysteresis if level > 0 else -inf
+
+class CycleThresholds:
+    """Tier and budget crossings of the consumption and cost of one billing cycle."""
+
+    __slots__ = ("budget", "_tariff", "_tiers", "_budget")
+
+    def __init__(self, budget: float):
+        """Initialize the trackers; a budget of 0 is never exceeded."""
+        self.budget = budget
+        self._tariff: TieredTariff | TimeOfUseTariff | None = None
+        self._tiers = ThresholdTracker([], TIER_HYSTERESIS)
+        self._budget = ThresholdTracker([budget] if budget > 0 else [], budget * BUDGET_HYSTERESIS)
+
+    def reset(self, kwh: float, cost_with_vat: float) -> None:
+        """Continue from the given values without reporting crossings, e.g. at the start of a cycle."""
+        self._tiers.reset(kwh)
+        self._budget.reset(cost_with_vat)
+
+    def update(self, tariff: TieredTariff | TimeOfUseTariff, kwh: float, cost_with_vat: float) -> list[tuple[str, dict]] | None:
+        """Apply new values and return the (event type, event data) of every crossing, or None."""
+        if tariff is not self._tariff:
+            # The boundaries follow the tariff in effect; the level under a new tariff is set silently
+            self._tariff = tariff
+            tiers = self._tiers
+            self._tiers = ThresholdTracker(tariff.boundaries if isinstance(tariff, TieredTariff) else [], TIER_HYSTERESIS)
+            if tiers.level is not None:
+                self._tiers.reset(kwh)
+        events = None
+        previous_tier = self._tiers.update(kwh)
+        if previous_tier is not None:
+            events = [(EVENT_TIER_CHANGED, {"tier": self._tiers.level + 1, "previous_tier": previous_tier + 1, "kwh": round(kwh, 2)})]
+        previous_budget = self._budget.update(cost_with_vat)
+        if previous_budget is not None and self._budget.level > previous_budget:
+            events = events or []
+            events.append((EVENT_BUDGET_EXCEEDED, {"budget": self.budget, "cost_with_vat": round(cost_with_vat)}))
+        return events